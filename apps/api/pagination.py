@@ -0,0 +1,131 @@
+"""
+Keyset pagination for the API lists.
+
+Each list view declares a unique ``keyset_ordering`` backed by an index,
+e.g. ``('scheduled_time', 'id')``. A page is fetched with a seek condition
+on the last row of the previous page, roughly
+``WHERE (scheduled_time, id) > (%s, %s) ORDER BY scheduled_time, id LIMIT n``,
+so no ``COUNT(*)`` runs and page 1000 costs the same as page 1. The opaque
+``cursor`` query parameter carries that position.
+
+Clients that want numbered pages and a total count over a small result set
+can pass ``?page=N`` instead.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_query_param = 'page'
+    invalid_cursor_message = 'Invalid cursor'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = tuple(getattr(view, 'keyset_ordering', ('pk',)))
+        self.page_number_pagination = None
+        if self.page_query_param in request.query_params:
+            self.page_number_pagination = PageNumberPagination()
+            self.page_number_pagination.page_size = self.page_size
+            self.page_number_pagination.page_size_query_param = self.page_size_query_param
+            self.page_number_pagination.max_page_size = self.max_page_size
+            return self.page_number_pagination.paginate_queryset(queryset.order_by(*self.ordering), request, view)
+        
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        model_fields = [queryset.model._meta.get_field(name) for name in self.fields]
+        page_size = self.get_page_size(request)
+        position, backwards = self.decode_cursor(request, model_fields)
+        
+        ordering = self.ordering
+        if backwards:
+            ordering = tuple(name[1:] if name.startswith('-') else f'-{name}' for name in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek(ordering, position))
+        
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+        
+        self.next_position = self.previous_position = None
+        if rows:
+            if has_more or backwards:
+                self.next_position = self._position(rows[-1])
+            if (has_more and backwards) or (position is not None and not backwards):
+                self.previous_position = self._position(rows[0])
+        return rows
+    
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+    
+    def _seek(self, ordering, position):
+        """Rows strictly after ``position`` in ``ordering``.
+        
+        The redundant range on the leading column lets the database start
+        the index scan at the position instead of filtering from the start.
+        """
+        lookups = ['lt' if name.startswith('-') else 'gt' for name in ordering]
+        condition = Q()
+        for i, lookup in enumerate(lookups):
+            condition |= Q(
+                **{field: value for field, value in zip(self.fields[:i], position[:i])},
+                **{f'{self.fields[i]}__{lookup}': position[i]},
+            )
+        return Q(**{f'{self.fields[0]}__{lookups[0]}e': position[0]}) & condition
+    
+    def _position(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+    
+    def decode_cursor(self, request, model_fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position = [field.to_python(value) for field, value in zip(model_fields, data['k'], strict=True)]
+            return position, bool(data.get('b'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+    
+    def encode_cursor(self, position, backwards=False):
+        data = {'k': position, 'b': 1} if backwards else {'k': position}
+        # DRF's encoder keeps microseconds; DjangoJSONEncoder would round
+        # datetimes to milliseconds and the seek would skip rows
+        encoded = base64.urlsafe_b64encode(json.dumps(data, cls=JSONEncoder).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+    
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+    
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, backwards=True)
+    
+    def get_paginated_response(self, data):
+        if self.page_number_pagination:
+            return self.page_number_pagination.get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
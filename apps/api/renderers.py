@@ -0,0 +1,65 @@
+"""
+orjson-backed JSON rendering for the API.
+
+``FastJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer``
+(compact, UTF-8, UUIDs as strings, UTC datetimes ending in ``Z``, U+2028
+and U+2029 escaped) several times faster. orjson serializes dicts, lists,
+UUIDs and datetimes natively and hands anything else (``Decimal``, lazy
+translations, querysets) to DRF's encoder.
+
+orjson spells some floats differently (``1e16`` for ``1e+16``, ``0.00001``
+for ``1e-05``) and writes NaN and infinities as ``null`` where DRF raises
+(``STRICT_JSON``), so data holding such a float is rendered by DRF itself,
+as is everything when orjson is not installed, an indented response is
+asked for, or the ``COMPACT_JSON``/``UNICODE_JSON`` settings are off.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson:
+    OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    _default = JSONEncoder().default
+
+_SCALARS = {str, int, bool, type(None)}
+
+
+def has_special_floats(node):
+    """Whether ``node`` holds a float that ``json`` writes in exponent notation or not at all."""
+    for value in (node.values() if isinstance(node, dict) else node):
+        kind = type(value)
+        if kind in _SCALARS:
+            continue
+        if kind is float:
+            # repr() switches to exponent notation outside this range
+            if not 1e-4 <= abs(value) < 1e16 and value != 0.0:
+                return True
+        elif isinstance(value, (dict, list, tuple)) and has_special_floats(value):
+            return True
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type or '', renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if has_special_floats((data,)):
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        ret = orjson.dumps(data, default=_default, option=OPTIONS)
+        # Escaped like DRF does, keeping the output a strict JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
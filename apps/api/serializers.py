@@ -1,11 +1,20 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from apps.core.models import UserProfile, PhoneVerification
+from apps.core.phone import phone_number_in_use
 from apps.calls.models import WakeUpCall, CallLog
 
 User = get_user_model()
 
 
+def validate_future_time(value):
+    """Ensure scheduled time is in the future."""
+    if value <= timezone.now():
+        raise serializers.ValidationError("Scheduled time must be in the future.")
+    return value
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserProfile
@@ -19,6 +28,17 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email', 'phone_number', 'is_phone_verified', 'profile']
         read_only_fields = ['id', 'is_phone_verified']
+    
+    def validate_phone_number(self, value):
+        if phone_number_in_use(value, self.instance):
+            raise serializers.ValidationError("This phone number is already in use.")
+        return value
+    
+    def update(self, instance, validated_data):
+        # A new number has to be verified again
+        if 'phone_number' in validated_data and validated_data['phone_number'] != instance.phone_number:
+            instance.is_phone_verified = False
+        return super().update(instance, validated_data)
 
 
 class PhoneVerificationSerializer(serializers.Serializer):
@@ -44,11 +64,7 @@ class WakeUpCallSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
     
     def validate_scheduled_time(self, value):
-        """Ensure scheduled time is in the future."""
-        from django.utils import timezone
-        if value <= timezone.now():
-            raise serializers.ValidationError("Scheduled time must be in the future.")
-        return value
+        return validate_future_time(value)
     
     def validate(self, attrs):
         """Validate that user has verified phone number."""
@@ -58,8 +74,19 @@ class WakeUpCallSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class WakeUpCallRescheduleSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    scheduled_time = serializers.DateTimeField()
+    
+    def validate_scheduled_time(self, value):
+        return validate_future_time(value)
+
+
 class CallLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = CallLog
-        fields = '__all__'
+        fields = [
+            'id', 'wakeup_call', 'status', 'twilio_sid', 'duration',
+            'error_message', 'weather_data', 'created_at'
+        ]
         read_only_fields = ['id', 'created_at']
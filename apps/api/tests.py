@@ -0,0 +1,131 @@
+import base64
+import json
+import uuid
+from datetime import timedelta
+from unittest import skipIf
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.calls.management.commands.bench_json_render import EDGE_CASES
+from apps.core.query_budget import query_budget
+from apps.core.testing import create_calls, create_user, create_users
+from .renderers import FastJSONRenderer, orjson
+from .serializers import WakeUpCallRescheduleSerializer
+
+# URL name -> maximum queries per request (session, request user with
+# profile, page), whatever the page size
+ENDPOINT_BUDGETS = {
+    'user-list': 3,
+    'user-me': 2,
+    'wakeupcall-list': 3,
+    'calllog-list': 3,
+}
+
+PAGE_SIZES = [1, 20, 100]
+
+# Extra queries allowed in ?page=N mode (the COUNT)
+PAGE_NUMBER_OVERHEAD = 1
+
+
+# Replicas cannot see the rows of a TestCase's open transaction
+@override_settings(DATABASE_REPLICAS=[])
+class QueryBudgetTests(TestCase):
+    """An N+1 shows up as a query count that grows with the page size."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        rows = max(PAGE_SIZES) + 5
+        cls.admin = create_user('budget_admin', role='admin')
+        cls.user = create_user('budget_user')
+        # Enough of everything to fill the largest page
+        create_users('budget_user_', rows)
+        create_calls(cls.user, rows, logs=True)
+    
+    def test_endpoints_stay_within_budget(self):
+        for who in [self.admin, self.user]:
+            self.client.force_login(who)
+            for name, budget in ENDPOINT_BUDGETS.items():
+                for page_size in PAGE_SIZES:
+                    for mode, extra in [('cursor', 0), ('page', PAGE_NUMBER_OVERHEAD)]:
+                        params = {'page_size': page_size, **({'page': 1} if mode == 'page' else {})}
+                        label = f'{who.role} {name} {mode} page_size={page_size}'
+                        with self.subTest(label):
+                            with query_budget(budget + extra, label, using=self.databases):
+                                response = self.client.get(reverse(name), params)
+                            self.assertEqual(response.status_code, 200)
+
+
+# Replicas cannot see the rows of a TestCase's open transaction
+@override_settings(DATABASE_REPLICAS=[])
+class ChangeFeedTests(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('changes_user')
+        create_calls(cls.user, 3, logs=True)
+    
+    def setUp(self):
+        self.client.force_login(self.user)
+    
+    def get(self, since):
+        return self.client.get(reverse('changes-list'), {'since': since})
+    
+    def encode(self, cursor):
+        return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+    
+    def test_cursor_round_trip(self):
+        with self.settings(CHANGE_FEED_SETTLE_SECONDS=-60):
+            response = self.client.get(reverse('changes-list'))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['call_logs']), 3)
+            response = self.get(response.data['cursor'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['call_logs'], [])
+    
+    def test_malformed_cursor_is_rejected(self):
+        at = timezone.now().isoformat()
+        cursors = {
+            'not base64': 'not a cursor',
+            'no timestamp': self.encode({}),
+            'unparseable timestamp': self.encode({'at': 'yesterday'}),
+            'naive timestamp': self.encode({'at': '2026-01-01T00:00:00'}),
+            'unparseable position timestamp': self.encode({'at': at, 'l': ['yesterday', 1]}),
+            'non-integer call log id': self.encode({'at': at, 'l': [at, 'abc']}),
+            'non-integer tombstone id': self.encode({'at': at, 'd': [at, 'abc']}),
+            'non-UUID wake-up call id': self.encode({'at': at, 'w': [at, 'abc']}),
+            'short position': self.encode({'at': at, 'w': [at]}),
+        }
+        for label, since in cursors.items():
+            with self.subTest(label):
+                self.assertEqual(self.get(since).status_code, 400)
+
+
+@skipIf(orjson is None, 'orjson is not installed')
+class FastJSONRendererTests(SimpleTestCase):
+    
+    def test_output_matches_drf(self):
+        for document in EDGE_CASES:
+            with self.subTest(document=document):
+                try:
+                    expected = JSONRenderer().render(document)
+                except ValueError:
+                    # STRICT_JSON rejects NaN and infinities
+                    with self.assertRaises(ValueError):
+                        FastJSONRenderer().render(document)
+                else:
+                    self.assertEqual(FastJSONRenderer().render(document), expected)
+
+
+class WakeUpCallRescheduleSerializerTests(SimpleTestCase):
+    
+    def test_scheduled_time_must_be_in_the_future(self):
+        for delta, valid in [(timedelta(hours=-1), False), (timedelta(hours=1), True)]:
+            with self.subTest(delta=delta):
+                serializer = WakeUpCallRescheduleSerializer(data={
+                    'id': str(uuid.uuid4()),
+                    'scheduled_time': (timezone.now() + delta).isoformat(),
+                })
+                self.assertEqual(serializer.is_valid(), valid, serializer.errors)
@@ -6,6 +6,7 @@ router = DefaultRouter()
 router.register(r'users', viewsets.UserViewSet, basename='user')
 router.register(r'wakeup-calls', viewsets.WakeUpCallViewSet, basename='wakeupcall')
 router.register(r'call-logs', viewsets.CallLogViewSet, basename='calllog')
+router.register(r'changes', viewsets.ChangeFeedViewSet, basename='changes')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,16 +1,29 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.utils.encoders import JSONEncoder
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import base64
+import json
+import uuid
 
 from apps.core.models import UserProfile, PhoneVerification
-from apps.calls.models import WakeUpCall, CallLog
+from apps.core.phone import phone_number_in_use
+from apps.calls.models import WakeUpCall, CallLog, Tombstone
+from apps.calls.changes import feed_horizon, read_changes, tombstone_horizon
+from apps.calls.events import publish_call_events
 from apps.calls.services import TwilioService, WeatherService
+from apps.core.versions import bump_user_versions
+from apps.scheduler.schedule import schedule_wakeup_calls, unschedule_wakeup_calls
+from .conditional import versioned_etag, visible_data
 from .serializers import (
     UserSerializer, UserProfileSerializer, PhoneVerificationSerializer,
-    WakeUpCallSerializer, CallLogSerializer
+    WakeUpCallSerializer, WakeUpCallRescheduleSerializer, CallLogSerializer
 )
 
 User = get_user_model()
@@ -20,13 +33,16 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('id',)
     
     def get_queryset(self):
-        if hasattr(self.request.user, 'profile') and self.request.user.profile.role == 'admin':
-            return User.objects.all()
-        return User.objects.filter(id=self.request.user.id)
+        users = User.objects.select_related('profile')
+        if self.request.user.is_admin:
+            return users
+        return users.filter(id=self.request.user.id)
     
     @action(detail=False, methods=['get'])
+    @versioned_etag()
     def me(self, request):
         """Get current user's profile."""
         serializer = self.get_serializer(request.user)
@@ -38,10 +54,15 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = PhoneVerificationSerializer(data=request.data)
         if serializer.is_valid():
             phone_number = serializer.validated_data['phone_number']
+            if phone_number_in_use(phone_number, request.user):
+                return self._phone_number_in_use()
             twilio_service = TwilioService()
             
             if twilio_service.send_verification_code(phone_number):
-                request.user.phone_number = phone_number
+                if phone_number != request.user.phone_number:
+                    # Verified again by verify_code
+                    request.user.phone_number = phone_number
+                    request.user.is_phone_verified = False
                 request.user.save()
                 return Response({'message': 'Verification code sent'})
             else:
@@ -61,8 +82,14 @@ class UserViewSet(viewsets.ModelViewSet):
             
             twilio_service = TwilioService()
             if twilio_service.verify_code(phone_number, code):
+                request.user.phone_number = phone_number
                 request.user.is_phone_verified = True
-                request.user.save()
+                try:
+                    with transaction.atomic():
+                        request.user.save()
+                except IntegrityError:
+                    # Another account verified the number since verify_phone
+                    return self._phone_number_in_use()
                 return Response({'message': 'Phone number verified successfully'})
             else:
                 return Response(
@@ -70,17 +97,30 @@ class UserViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    def _phone_number_in_use(self):
+        return Response(
+            {'phone_number': ['This phone number is already in use.']},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
 
 class WakeUpCallViewSet(viewsets.ModelViewSet):
     serializer_class = WakeUpCallSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('scheduled_time', 'id')
+    # Largest list accepted by the bulk actions
+    bulk_max_items = 100
     
     def get_queryset(self):
-        if hasattr(self.request.user, 'profile') and self.request.user.profile.role == 'admin':
+        if self.request.user.is_admin:
             return WakeUpCall.objects.all()
         return WakeUpCall.objects.filter(user=self.request.user)
     
+    @versioned_etag(visible_data)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
@@ -88,8 +128,10 @@ class WakeUpCallViewSet(viewsets.ModelViewSet):
     def cancel(self, request, pk=None):
         """Cancel a wake-up call."""
         wakeup_call = self.get_object()
-        wakeup_call.status = 'cancelled'
-        wakeup_call.save()
+        calls = WakeUpCall.objects.filter(pk=wakeup_call.pk)
+        if not calls.transition(WakeUpCall.PENDING_STATUSES, status='cancelled'):
+            return self._transition_lost(wakeup_call)
+        unschedule_wakeup_calls([wakeup_call.pk])
         return Response({'message': 'Wake-up call cancelled'})
     
     @action(detail=True, methods=['post'])
@@ -105,9 +147,12 @@ class WakeUpCallViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            wakeup_call.scheduled_time = timezone.datetime.fromisoformat(new_time.replace('Z', '+00:00'))
-            wakeup_call.status = 'scheduled'
-            wakeup_call.save()
+            scheduled_time = timezone.datetime.fromisoformat(new_time.replace('Z', '+00:00'))
+            WakeUpCall.objects.filter(pk=wakeup_call.pk).transition(
+                None, scheduled_time=scheduled_time, status='scheduled'
+            )
+            wakeup_call.scheduled_time = scheduled_time
+            schedule_wakeup_calls([wakeup_call])
             return Response({'message': 'Wake-up call rescheduled'})
         except ValueError:
             return Response(
@@ -127,16 +172,240 @@ class WakeUpCallViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        wakeup_call.contact_method = new_method
-        wakeup_call.save()
+        calls = WakeUpCall.objects.filter(pk=wakeup_call.pk)
+        if not calls.transition(WakeUpCall.PENDING_STATUSES, contact_method=new_method):
+            return self._transition_lost(wakeup_call)
         return Response({'message': 'Contact method updated'})
+    
+    def _transition_lost(self, wakeup_call):
+        wakeup_call.refresh_from_db(fields=['status'])
+        return Response(
+            {'error': f'Wake-up call is already {wakeup_call.status}'},
+            status=status.HTTP_409_CONFLICT
+        )
+    
+    # Bulk actions take a JSON list, validate every item first, write in
+    # one batch, and answer 200 with one result per item, in order.
+    
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """Create many wake-up calls."""
+        error = self._check_batch(request.data)
+        if error:
+            return error
+        
+        results = []
+        created = []
+        for index, item in enumerate(request.data):
+            serializer = self.get_serializer(data=item)
+            if not serializer.is_valid():
+                results.append({'index': index, 'status': 'invalid', 'errors': serializer.errors})
+                continue
+            data = dict(serializer.validated_data)
+            # Set phone_number from user if not provided
+            data['phone_number'] = data.get('phone_number') or request.user.phone_number
+            wakeup_call = WakeUpCall(user=request.user, **data)
+            created.append(wakeup_call)
+            results.append({'index': index, 'status': 'created', 'id': str(wakeup_call.pk)})
+        
+        with transaction.atomic():
+            # bulk_create sends no post_save, so the calls are scheduled here
+            # in one batch instead of one signal per call
+            WakeUpCall.objects.bulk_create(created)
+            schedule_wakeup_calls([call for call in created if call.status == 'scheduled'])
+        if created:
+            bump_user_versions([request.user.pk])
+        return Response({'results': results})
+    
+    @action(detail=False, methods=['post'])
+    def bulk_cancel(self, request):
+        """Cancel many wake-up calls, given a list of IDs."""
+        error = self._check_batch(request.data)
+        if error:
+            return error
+        
+        ids = {}
+        for index, value in enumerate(request.data):
+            try:
+                ids[index] = uuid.UUID(str(value))
+            except ValueError:
+                pass
+        
+        with transaction.atomic():
+            # Lock the rows so every pending call found here is cancelled
+            statuses = dict(
+                self.get_queryset().filter(pk__in=ids.values())
+                .select_for_update().values_list('pk', 'status')
+            )
+            cancelled = {pk for pk, call_status in statuses.items() if call_status in WakeUpCall.PENDING_STATUSES}
+            WakeUpCall.objects.filter(pk__in=cancelled).transition(WakeUpCall.PENDING_STATUSES, status='cancelled')
+            unschedule_wakeup_calls(cancelled)
+        
+        results = []
+        for index, value in enumerate(request.data):
+            pk = ids.get(index)
+            if pk is None:
+                results.append({'index': index, 'status': 'invalid', 'errors': {'id': ['Must be a valid UUID.']}})
+            elif pk not in statuses:
+                results.append({'index': index, 'status': 'not_found', 'id': str(pk)})
+            elif pk in cancelled:
+                results.append({'index': index, 'status': 'cancelled', 'id': str(pk)})
+            else:
+                results.append({
+                    'index': index, 'status': 'conflict', 'id': str(pk),
+                    'error': f'Wake-up call is already {statuses[pk]}',
+                })
+        return Response({'results': results})
+    
+    @action(detail=False, methods=['post'])
+    def bulk_reschedule(self, request):
+        """Reschedule many wake-up calls, given a list of ``{id, scheduled_time}``."""
+        error = self._check_batch(request.data)
+        if error:
+            return error
+        
+        valid = {}
+        results = []
+        for index, item in enumerate(request.data):
+            serializer = WakeUpCallRescheduleSerializer(data=item)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+                results.append({'index': index, 'id': str(serializer.validated_data['id'])})
+            else:
+                results.append({'index': index, 'status': 'invalid', 'errors': serializer.errors})
+        
+        with transaction.atomic():
+            calls = {
+                call.pk: call for call in
+                self.get_queryset().filter(pk__in=[data['id'] for data in valid.values()]).select_for_update()
+            }
+            now = timezone.now()
+            for data in valid.values():
+                call = calls.get(data['id'])
+                if call:
+                    call.scheduled_time = data['scheduled_time']
+                    call.status = 'scheduled'
+                    call.updated_at = now
+            WakeUpCall.objects.bulk_update(calls.values(), ['scheduled_time', 'status', 'updated_at'])
+            schedule_wakeup_calls(list(calls.values()))
+            publish_call_events([
+                (call.pk, call.user_id, {'status': call.status, 'scheduled_time': call.scheduled_time})
+                for call in calls.values()
+            ])
+        bump_user_versions({call.user_id for call in calls.values()})
+        
+        for index, data in valid.items():
+            results[index]['status'] = 'rescheduled' if data['id'] in calls else 'not_found'
+        return Response({'results': results})
+    
+    def _check_batch(self, items):
+        if not isinstance(items, list) or not 0 < len(items) <= self.bulk_max_items:
+            return Response(
+                {'error': f'Expected a list of 1 to {self.bulk_max_items} items'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return None
 
 
 class CallLogViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CallLogSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
-        if hasattr(self.request.user, 'profile') and self.request.user.profile.role == 'admin':
+        if self.request.user.is_admin:
             return CallLog.objects.all()
         return CallLog.objects.filter(wakeup_call__user=self.request.user)
+
+
+class ChangeFeedViewSet(viewsets.ViewSet):
+    """Wake-up calls and call logs changed, and deleted, since a sync cursor.
+    
+    Start without ``since``, then keep passing the returned ``cursor`` as
+    ``?since=``; repeat at once while ``has_more`` is true.
+    """
+    permission_classes = [IsAuthenticated]
+    page_size = 100
+    max_page_size = 1000
+    
+    # Response key -> (cursor key, timestamp field)
+    streams = {
+        'wakeup_calls': ('w', 'updated_at'),
+        'call_logs': ('l', 'updated_at'),
+        'deleted': ('d', 'deleted_at'),
+    }
+    
+    def get_querysets(self):
+        user = self.request.user
+        querysets = {
+            'wakeup_calls': WakeUpCall.objects.all(),
+            'call_logs': CallLog.objects.all(),
+            'deleted': Tombstone.objects.all(),
+        }
+        if user.is_admin:
+            return querysets
+        return {
+            'wakeup_calls': querysets['wakeup_calls'].filter(user=user),
+            'call_logs': querysets['call_logs'].filter(wakeup_call__user=user),
+            'deleted': querysets['deleted'].filter(owner_id=user.pk),
+        }
+    
+    def list(self, request):
+        positions = self.decode_cursor(request.query_params.get('since'))
+        if positions is not None and positions['at'] < tombstone_horizon():
+            return Response(
+                {'error': 'Cursor too old; sync again without since'},
+                status=status.HTTP_410_GONE
+            )
+        
+        try:
+            limit = min(max(int(request.query_params['page_size']), 1), self.max_page_size)
+        except (KeyError, ValueError):
+            limit = self.page_size
+        horizon = feed_horizon()
+        
+        changes = {}
+        cursor = {'at': horizon}
+        has_more = False
+        for name, queryset in self.get_querysets().items():
+            key, field = self.streams[name]
+            position = positions and positions.get(key)
+            rows = read_changes(queryset, field, position, horizon, limit)
+            has_more = has_more or len(rows) > limit
+            rows = rows[:limit]
+            changes[name] = rows
+            cursor[key] = [getattr(rows[-1], field), rows[-1].pk] if rows else position
+        
+        return Response({
+            'wakeup_calls': WakeUpCallSerializer(changes['wakeup_calls'], many=True).data,
+            'call_logs': CallLogSerializer(changes['call_logs'], many=True).data,
+            'deleted': [{'kind': row.kind, 'id': row.object_id} for row in changes['deleted']],
+            'cursor': self.encode_cursor(cursor),
+            'has_more': has_more,
+        })
+    
+    def encode_cursor(self, cursor):
+        return base64.urlsafe_b64encode(json.dumps(cursor, cls=JSONEncoder).encode()).decode()
+    
+    def decode_cursor(self, encoded):
+        """``{'at': timestamp, key: (timestamp, pk)}`` from ``since``; 400 unless every value parses."""
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            positions = {'at': self.parse_timestamp(data['at'])}
+            for name, queryset in self.get_querysets().items():
+                key, _ = self.streams[name]
+                if data.get(key) is not None:
+                    at, pk = data[key]
+                    # Cleaned like a form field, so the ORM only sees values of the column's type
+                    positions[key] = (self.parse_timestamp(at), queryset.model._meta.pk.to_python(pk))
+            return positions
+        except Exception:
+            raise ValidationError({'since': ['Invalid cursor.']})
+    
+    def parse_timestamp(self, value):
+        at = parse_datetime(value)
+        if at is None or timezone.is_naive(at):
+            raise ValueError(f'invalid timestamp: {value!r}')
+        return at
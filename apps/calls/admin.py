@@ -2,13 +2,33 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
+from apps.core.admin_changelists import ScalableChangeListMixin
 from .models import WakeUpCall, CallLog, InboundCall
+from .status_buffer import CALL_STATUSES
+
+
+class TwilioCallStatusFilter(admin.SimpleListFilter):
+    """Twilio's call statuses, listed without a DISTINCT scan of the table."""
+    title = 'status'
+    parameter_name = 'status'
+    
+    def lookups(self, request, model_admin):
+        return [
+            (status, status.replace('-', ' ').title())
+            for status in CALL_STATUSES
+        ]
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(status=self.value())
+        return queryset
 
 
 @admin.register(WakeUpCall)
-class WakeUpCallAdmin(admin.ModelAdmin):
+class WakeUpCallAdmin(ScalableChangeListMixin, admin.ModelAdmin):
     list_display = ('call_info', 'scheduled_time_display', 'contact_method_display', 'status', 'status_display', 'user_info', 'demo_status', 'quick_actions')
     list_filter = ('status', 'contact_method', 'is_demo', 'scheduled_time', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'phone_number', 'zip_code')
     readonly_fields = ('id', 'created_at', 'updated_at', 'last_executed', 'next_execution')
     list_editable = ('status',)
@@ -138,7 +158,7 @@ class WakeUpCallAdmin(admin.ModelAdmin):
 
 
 @admin.register(CallLog)
-class CallLogAdmin(admin.ModelAdmin):
+class CallLogAdmin(ScalableChangeListMixin, admin.ModelAdmin):
     list_display = ('call_info', 'status_display', 'twilio_sid_display', 'duration_display', 'created_at')
     list_filter = ('status', 'created_at', 'wakeup_call__contact_method')
     search_fields = ('wakeup_call__user__username', 'twilio_sid', 'wakeup_call__phone_number')
@@ -217,9 +237,10 @@ class CallLogAdmin(admin.ModelAdmin):
 
 
 @admin.register(InboundCall)
-class InboundCallAdmin(admin.ModelAdmin):
+class InboundCallAdmin(ScalableChangeListMixin, admin.ModelAdmin):
     list_display = ('call_participants', 'status_display', 'duration_display', 'user_info', 'created_at')
-    list_filter = ('status', 'created_at')
+    list_filter = (TwilioCallStatusFilter, 'created_at')
+    list_select_related = ('user',)
     search_fields = ('from_number', 'to_number', 'user__username')
     readonly_fields = ('created_at', 'duration')
     date_hierarchy = 'created_at'
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CallsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.calls'
+    
+    def ready(self):
+        from .changes import connect_tombstone_signals
+        connect_tombstone_signals()
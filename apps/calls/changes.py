@@ -0,0 +1,111 @@
+"""
+Change feed for incremental client sync.
+
+A sync returns the wake-up calls and call logs changed since the client's
+cursor (by ``updated_at``) and tombstones of the deleted ones. Each stream
+is read by keyset on ``(timestamp, id)``, so a sync costs the amount of
+change rather than the history size.
+
+Timestamps are taken before commit, so a row can become visible after a
+later timestamp was already handed out. Feeds therefore stop
+``CHANGE_FEED_SETTLE_SECONDS`` in the past, longer than any write
+transaction here. Tombstones are kept for ``CHANGE_FEED_TOMBSTONE_DAYS``;
+older cursors must resync from scratch. CallLog partitions are dropped
+without firing the delete triggers, so their logs are tombstoned by
+``tombstone_table_call_logs`` first.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from .models import WakeUpCall, CallLog, Tombstone
+
+logger = logging.getLogger(__name__)
+
+
+def feed_horizon(now=None):
+    """Latest timestamp a feed may include; later rows may still be uncommitted."""
+    return (now or timezone.now()) - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+
+
+def tombstone_horizon(now=None):
+    """Cursors issued before this may have missed pruned tombstones."""
+    return (now or timezone.now()) - timedelta(days=settings.CHANGE_FEED_TOMBSTONE_DAYS)
+
+
+def read_changes(queryset, field, position, horizon, limit):
+    """Up to ``limit + 1`` rows after ``position`` (``(timestamp, id)`` or None) up to ``horizon``."""
+    queryset = queryset.filter(**{f'{field}__lte': horizon}).order_by(field, 'id')
+    if position is not None:
+        at, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__gt': at}) | Q(**{field: at, 'id__gt': pk}),
+            **{f'{field}__gte': at},
+        )
+    return list(queryset[:limit + 1])
+
+
+def prune_tombstones(now=None):
+    """Delete tombstones older than the change feed keeps them. Returns the number deleted."""
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=tombstone_horizon(now)).delete()
+    if deleted:
+        logger.info(f"Pruned {deleted} change feed tombstones")
+    return deleted
+
+
+def tombstone_wakeup_call(sender, instance, using, **kwargs):
+    Tombstone.objects.using(using).create(
+        kind=Tombstone.WAKEUP_CALL, object_id=str(instance.pk), owner_id=instance.user_id
+    )
+
+
+def tombstone_call_log(sender, instance, using, **kwargs):
+    # Logs are deleted before their wake-up call, which is still there
+    owner_id = WakeUpCall.objects.using(using).values_list('user_id', flat=True).get(pk=instance.wakeup_call_id)
+    Tombstone.objects.using(using).create(
+        kind=Tombstone.CALL_LOG, object_id=str(instance.pk), owner_id=owner_id
+    )
+
+
+def tombstone_table_call_logs(connection, table, batch_size):
+    """Write tombstones for the call logs in ``table`` (a CallLog partition). Returns the number written.
+    
+    One short transaction per batch of ``batch_size`` logs, keeping each
+    batch's timestamps within the change feed's settle window.
+    """
+    written = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"""
+                WITH batch AS (
+                    SELECT id, wakeup_call_id FROM "{table}" WHERE id > %s ORDER BY id LIMIT %s
+                ), tombstones AS (
+                    INSERT INTO {Tombstone._meta.db_table} (kind, object_id, owner_id, deleted_at)
+                    SELECT %s, batch.id::text, call.user_id, clock_timestamp()
+                    FROM batch JOIN {WakeUpCall._meta.db_table} call ON call.id = batch.wakeup_call_id
+                    RETURNING 1
+                )
+                SELECT (SELECT max(id) FROM batch), (SELECT count(*) FROM tombstones)
+            """, [last_pk, batch_size, Tombstone.CALL_LOG])
+            last_pk, count = cursor.fetchone()
+        if last_pk is None:
+            return written
+        written += count
+
+
+def connect_tombstone_signals():
+    """Write tombstones from ``post_delete`` where there are no triggers.
+    
+    PostgreSQL writes them from triggers (migration 0008). The receivers
+    are not connected there at all: any ``post_delete`` receiver makes
+    Django load every row of a bulk or cascading delete.
+    """
+    if connection.vendor != 'postgresql':
+        post_delete.connect(tombstone_wakeup_call, sender=WakeUpCall)
+        post_delete.connect(tombstone_call_log, sender=CallLog)
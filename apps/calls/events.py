@@ -0,0 +1,144 @@
+"""
+Live wake-up call status events.
+
+``WakeUpCall.objects.transition`` publishes one JSON event per changed row,
+after commit, on the owner's Redis channel (``CALL_EVENTS_CHANNEL_PREFIX``
++ user ID). ``CallEventsView`` relays them to the dashboard as Server-Sent
+Events.
+
+Each process holds a single pattern subscription and fans messages out to
+in-memory queues, one per open stream, so an idle dashboard costs a
+coroutine and a queue rather than a worker thread or a Redis connection.
+Events are best effort: a slow or reconnecting client can miss some, and
+the dashboard falls back to the data it already shows.
+"""
+import asyncio
+import json
+import logging
+import weakref
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from .redis_clients import get_async_client, get_client
+
+logger = logging.getLogger(__name__)
+
+
+def channel_name(user_id):
+    return f"{settings.CALL_EVENTS_CHANNEL_PREFIX}{user_id}"
+
+
+def _messages(events):
+    """``(channel, payload)`` for each ``(id, user_id, changes)`` event."""
+    for pk, user_id, changes in events:
+        payload = json.dumps({'id': pk, **changes}, cls=JSONEncoder)
+        yield channel_name(user_id), payload
+
+
+def _publish(messages):
+    try:
+        with get_client().pipeline(transaction=False) as pipe:
+            for channel, payload in messages:
+                pipe.publish(channel, payload)
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.error(f"Failed to publish {len(messages)} call events: {e}")
+
+
+def publish_call_events(events):
+    """Publish ``(id, user_id, changes)`` events once the transaction commits."""
+    messages = list(_messages(events))
+    if messages:
+        transaction.on_commit(lambda: _publish(messages))
+
+
+async def apublish_call_events(events):
+    # Only used outside transactions, where on_commit would run immediately
+    messages = list(_messages(events))
+    if not messages:
+        return
+    try:
+        async with get_async_client().pipeline(transaction=False) as pipe:
+            for channel, payload in messages:
+                pipe.publish(channel, payload)
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.error(f"Failed to publish {len(messages)} call events: {e}")
+
+
+class CallEventHub:
+    """Relay the call event channels to the streams open in this process."""
+    
+    def __init__(self):
+        self.queues = defaultdict(set)
+        self._reader = None
+    
+    @asynccontextmanager
+    async def listen(self, user_id):
+        """Yield a queue receiving the user's event payloads while the block runs."""
+        queue = asyncio.Queue(maxsize=settings.CALL_EVENTS_QUEUE_SIZE)
+        channel = channel_name(user_id)
+        self.queues[channel].add(queue)
+        if self._reader is None or self._reader.done():
+            # (Re)start after the first listener or a lost Redis connection
+            self._reader = asyncio.create_task(self._read())
+        try:
+            yield queue
+        finally:
+            self.queues[channel].discard(queue)
+            if not self.queues[channel]:
+                del self.queues[channel]
+    
+    async def _read(self):
+        pubsub = get_async_client().pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.psubscribe(f"{settings.CALL_EVENTS_CHANNEL_PREFIX}*")
+            async for message in pubsub.listen():
+                for queue in self.queues.get(message['channel'].decode(), ()):
+                    try:
+                        queue.put_nowait(message['data'].decode())
+                    except asyncio.QueueFull:
+                        # The client is not keeping up; it misses this one
+                        pass
+        except redis.RedisError as e:
+            logger.error(f"Call event subscription lost: {e}")
+        finally:
+            await pubsub.aclose()
+
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_hub():
+    # One hub per event loop, like the Redis clients it reads from
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = CallEventHub()
+    return hub
+
+
+async def stream_call_events(user_id):
+    """Server-Sent Events for one user's calls.
+    
+    The stream ends after ``CALL_EVENTS_STREAM_SECONDS`` and the browser
+    reconnects; Django 4.2 does not stop a stream when the client goes
+    away, so this bounds how long an abandoned one lives.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.CALL_EVENTS_STREAM_SECONDS
+    yield f"retry: {settings.CALL_EVENTS_RETRY_MS}\n\n"
+    async with get_hub().listen(user_id) as queue:
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                payload = await asyncio.wait_for(queue.get(), min(settings.CALL_EVENTS_KEEPALIVE_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: wakeup_call\ndata: {payload}\n\n"
@@ -0,0 +1,109 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+import time
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.api.parsers import FastJSONParser
+from apps.api.renderers import FastJSONRenderer, orjson
+from apps.api.serializers import CallLogSerializer
+from apps.calls.models import WakeUpCall, CallLog
+from apps.core.uuids import uuid7
+
+
+# Documents orjson would write differently without the renderer's fallbacks
+EDGE_CASES = [
+    {'description': 'line\u2028and paragraph\u2029separators'},
+    {'floats': [1e16, -1.5e16, 1e22, 1.7976931348623157e308, 12345678901234567890.0]},
+    {'floats': [1e-5, 1.5e-7, 5e-324, -0.0, 0.0001, 123456789012345.6, 0.1 + 0.2]},
+    {'nested': [{'temperature': float('nan')}]},
+    [float('inf')],
+    float('-inf'),
+    1e16,
+    {'decimal': Decimal('1.10'), 'uuid': uuid7(), 'when': timezone.now(), 'emoji': '\u23f0'},
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the orjson renderer/parser against DRF\'s stdlib JSON on CallLog pages'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000,
+            help='CallLog rows per page (default: 1000)'
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=200,
+            help='Renders/parses per implementation (default: 200)'
+        )
+    
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed; FastJSONRenderer falls back to the stdlib.')
+        
+        rows, rounds = options['rows'], options['rounds']
+        page = {'next': None, 'previous': None, 'results': CallLogSerializer(self._logs(rows), many=True).data}
+        
+        # Output must be byte-identical before timing means anything
+        for document in [page, *EDGE_CASES]:
+            if self._render(JSONRenderer(), document) != self._render(FastJSONRenderer(), document):
+                raise CommandError(f'FastJSONRenderer output differs from JSONRenderer for {document!r:.200}')
+        stdlib = JSONRenderer().render(page)
+        fast = FastJSONRenderer().render(page)
+        if FastJSONParser().parse(BytesIO(fast)) != JSONParser().parse(BytesIO(stdlib)):
+            raise CommandError('FastJSONParser result differs from JSONParser')
+        
+        self.stdout.write(f'{rounds} rounds of a {rows}-row CallLog page ({len(fast) / 1024:.0f} KiB)...')
+        pairs = [
+            ('render', lambda: JSONRenderer().render(page), lambda: FastJSONRenderer().render(page)),
+            ('parse', lambda: JSONParser().parse(BytesIO(stdlib)), lambda: FastJSONParser().parse(BytesIO(fast))),
+        ]
+        for label, slow, quick in pairs:
+            slow_time = self._time(slow, rounds)
+            quick_time = self._time(quick, rounds)
+            self.stdout.write(
+                f'{label}: stdlib {slow_time / rounds * 1000:.2f}ms/page, '
+                f'orjson {quick_time / rounds * 1000:.2f}ms/page ({slow_time / quick_time:.1f}x faster)'
+            )
+    
+    def _render(self, renderer, document):
+        try:
+            return renderer.render(document)
+        except ValueError as e:
+            # STRICT_JSON rejects NaN and infinities
+            return type(e)
+    
+    def _logs(self, rows):
+        # Unsaved rows shaped like real ones; the database is not involved
+        now = timezone.now()
+        wakeup_call = WakeUpCall(id=uuid7())
+        return [
+            CallLog(
+                id=index + 1,
+                wakeup_call=wakeup_call,
+                status='completed' if index % 5 else 'no_answer',
+                twilio_sid=f'CA{index:032x}',
+                duration=30 + index % 60,
+                error_message='',
+                weather_data={
+                    'temperature': 41.3 + index % 40, 'description': 'light rain', 'humidity': 80,
+                    'feels_like': 37.1, 'location': 'New York',
+                },
+                created_at=now - timedelta(minutes=index),
+            )
+            for index in range(rows)
+        ]
+    
+    def _time(self, func, rounds):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return time.perf_counter() - start
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from datetime import datetime
+from types import SimpleNamespace
+import time
+
+from apps.calls.services import (
+    build_voice_response, build_sms_message,
+    generate_voice_response, generate_sms_message,
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the precompiled TwiML/SMS renderers against the element-tree builders'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--renders',
+            type=int,
+            default=100000,
+            help='Number of renders per renderer (default: 100000)'
+        )
+    
+    def handle(self, *args, **options):
+        renders = options['renders']
+        wakeup_call = SimpleNamespace(scheduled_time=datetime(2025, 1, 6, 7, 0))
+        samples = [
+            {'temperature': 41.3, 'description': 'light rain', 'humidity': 80,
+             'feels_like': 37.1, 'location': 'New York'},
+            {'temperature': 'N/A', 'description': 'Weather unavailable', 'humidity': 'N/A',
+             'feels_like': 'N/A', 'location': 'Unknown'},
+            {'temperature': 70, 'description': 'clear <sky> & "sun"', 'location': "O'Hare"},
+            None,
+        ]
+        
+        # Output must be byte-identical before timing means anything
+        for weather_data in samples:
+            if generate_voice_response(weather_data, wakeup_call) != build_voice_response(weather_data, wakeup_call):
+                raise CommandError(f'TwiML mismatch for {weather_data!r}')
+            if generate_sms_message(weather_data, wakeup_call) != build_sms_message(weather_data, wakeup_call):
+                raise CommandError(f'SMS mismatch for {weather_data!r}')
+        
+        weather_data = samples[0]
+        pairs = [
+            ('TwiML', build_voice_response, generate_voice_response),
+            ('SMS', build_sms_message, generate_sms_message),
+        ]
+        
+        self.stdout.write(f'Rendering {renders} messages per renderer...')
+        for label, builder, compiled in pairs:
+            builder_time = self._time(builder, weather_data, wakeup_call, renders)
+            compiled_time = self._time(compiled, weather_data, wakeup_call, renders)
+            self.stdout.write(
+                f'{label}: builder {builder_time:.3f}s, compiled {compiled_time:.3f}s '
+                f'({builder_time / compiled_time:.1f}x faster)'
+            )
+    
+    def _time(self, renderer, weather_data, wakeup_call, renders):
+        start = time.perf_counter()
+        for _ in range(renders):
+            renderer(weather_data, wakeup_call)
+        return time.perf_counter() - start
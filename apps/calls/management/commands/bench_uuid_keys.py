@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+import io
+import time
+import uuid
+
+from apps.core.uuids import uuid7
+
+
+class Command(BaseCommand):
+    help = 'Compare insert throughput and index size of uuid4 and uuid7 primary keys (PostgreSQL)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10_000_000,
+            help='Rows inserted per key type (default: 10000000)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100_000,
+            help='Rows per COPY and transaction (default: 100000)'
+        )
+    
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The UUID key benchmark requires PostgreSQL.')
+        
+        rows = options['rows']
+        self.stdout.write(
+            f'Inserting {rows} rows per key type into a table shaped like calls_wakeupcall '
+            f'(uuid primary key) and calls_calllog (uuid foreign key index)...'
+        )
+        for label, generate in [('uuid4', uuid.uuid4), ('uuid7', uuid7)]:
+            table = f'bench_uuid_{label}'
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {table}')
+                cursor.execute(f'CREATE TABLE {table} (id uuid PRIMARY KEY, created_at timestamptz NOT NULL)')
+                cursor.execute(f'CREATE INDEX {table}_fk_idx ON {table} (id, created_at)')
+            try:
+                elapsed = self._insert(table, generate, rows, options['batch_size'])
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT pg_relation_size(%s), pg_relation_size(%s)',
+                        [f'{table}_pkey', f'{table}_fk_idx']
+                    )
+                    pkey_size, fk_size = cursor.fetchone()
+                self.stdout.write(
+                    f'{label}: {rows / elapsed:,.0f} rows/s, primary key index {pkey_size / 2 ** 20:,.1f} MiB, '
+                    f'foreign key index {fk_size / 2 ** 20:,.1f} MiB'
+                )
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DROP TABLE IF EXISTS {table}')
+    
+    def _insert(self, table, generate, rows, batch_size):
+        now = timezone.now().isoformat()
+        elapsed = 0
+        for start in range(0, rows, batch_size):
+            count = min(batch_size, rows - start)
+            # Generate outside the timed section; only the database work counts
+            data = io.StringIO(''.join(f'{generate()}\t{now}\n' for _ in range(count)))
+            begin = time.perf_counter()
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.copy_expert(f'COPY {table} (id, created_at) FROM STDIN', data)
+            elapsed += time.perf_counter() - begin
+        return elapsed
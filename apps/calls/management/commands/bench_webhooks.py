@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, override_settings
+from django.utils import timezone
+import asyncio
+import time
+
+from apps.calls.models import WakeUpCall, CallLog
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure call-status webhook throughput of one ASGI worker under a burst of callbacks'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--callbacks',
+            type=int,
+            default=2000,
+            help='Number of status callbacks in the burst (default: 2000)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=50,
+            help='Callbacks in flight at once (default: 50)'
+        )
+        parser.add_argument(
+            '--calls',
+            type=int,
+            default=200,
+            help='Number of call logs the callbacks are spread over (default: 200)'
+        )
+    
+    def handle(self, *args, **options):
+        # Twilio stand-in: a throwaway user and call logs with fake SIDs
+        user = User.objects.create(username=f'bench_webhooks_{int(time.time())}')
+        try:
+            wakeup_call = WakeUpCall.objects.create(
+                user=user,
+                scheduled_time=timezone.now(),
+                phone_number='+15550000000',
+                contact_method='call',
+                zip_code='10001',
+                status='completed',
+                is_demo=True,
+            )
+            sids = [f'CAbench{user.pk}x{i:06d}' for i in range(options['calls'])]
+            CallLog.objects.bulk_create(
+                CallLog(wakeup_call=wakeup_call, status='initiated', twilio_sid=sid) for sid in sids
+            )
+            
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                for concurrency in sorted({1, options['concurrency']}):
+                    elapsed = asyncio.run(self._burst(sids, options['callbacks'], concurrency))
+                    self.stdout.write(
+                        f'concurrency {concurrency}: {options["callbacks"]} callbacks in {elapsed:.2f}s '
+                        f'({options["callbacks"] / elapsed:.0f} req/s per worker)'
+                    )
+        finally:
+            user.delete()
+    
+    async def _burst(self, sids, callbacks, concurrency):
+        client = AsyncClient()
+        statuses = ['initiated', 'ringing', 'in-progress', 'completed']
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def callback(i):
+            async with semaphore:
+                response = await client.post('/calls/call-status/', {
+                    'CallSid': sids[i % len(sids)],
+                    'CallStatus': statuses[i % len(statuses)],
+                    'CallDuration': str(i % 60),
+                })
+                assert response.status_code == 200
+        
+        start = time.perf_counter()
+        await asyncio.gather(*(callback(i) for i in range(callbacks)))
+        return time.perf_counter() - start
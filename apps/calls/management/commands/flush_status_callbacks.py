@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+import time
+
+from apps.calls.status_buffer import StatusFlusher
+
+
+class Command(BaseCommand):
+    help = 'Apply buffered Twilio status callbacks to the database in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval-ms',
+            type=int,
+            default=settings.STATUS_BUFFER_FLUSH_INTERVAL_MS,
+            help='Pause between flushes when the buffer is drained (default: STATUS_BUFFER_FLUSH_INTERVAL_MS)'
+        )
+        parser.add_argument(
+            '--consumer',
+            help='Consumer name within the flusher group (default: hostname)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the buffer once and exit instead of running continuously'
+        )
+    
+    def handle(self, *args, **options):
+        flusher = StatusFlusher(consumer=options['consumer'])
+        interval = options['interval_ms']
+        
+        self.stdout.write(f'Flushing status callbacks from {flusher.stream} as {flusher.consumer}...')
+        
+        while True:
+            # Recycle the persistent connection like a request would
+            # (CONN_MAX_AGE, health check after a database restart)
+            close_old_connections()
+            consumed = flusher.flush()
+            if consumed >= settings.STATUS_BUFFER_BATCH_SIZE:
+                # A full batch means more is waiting; keep draining
+                continue
+            if options['once']:
+                if not consumed and flusher.caught_up:
+                    break
+                continue
+            time.sleep(interval / 1000)
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.calls import partitions
+from apps.core.archival import retire_calllog_partitions
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly CallLog partitions and retire old ones'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=settings.CALLLOG_PARTITION_MONTHS_AHEAD,
+            help='Months of partitions to keep ready ahead of the current one '
+                 '(default: CALLLOG_PARTITION_MONTHS_AHEAD)'
+        )
+        parser.add_argument(
+            '--retire-older-than',
+            type=int,
+            metavar='MONTHS',
+            default=settings.CALLLOG_RETENTION_MONTHS,
+            help='Archive, tombstone and drop partitions more than this many months old; '
+                 '0 keeps everything (default: CALLLOG_RETENTION_MONTHS)'
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='Only list the attached partitions'
+        )
+    
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned(connection):
+            raise CommandError('calls_calllog is not a partitioned table (PostgreSQL only).')
+        
+        if options['list']:
+            for month, name in sorted(partitions.list_partitions(connection).items()):
+                self.stdout.write(f'{month:%Y-%m}  {name}')
+            return
+        
+        this_month = partitions.month_start(timezone.now())
+        created = partitions.create_partitions(
+            connection, this_month, partitions.add_months(this_month, options['ahead'])
+        )
+        self.stdout.write(f"Created {len(created)} partitions{': ' + ', '.join(created) if created else ''}")
+        
+        retired = []
+        if options['retire_older_than']:
+            retired = retire_calllog_partitions(
+                connection, partitions.add_months(this_month, -options['retire_older_than'])
+            )
+        self.stdout.write(f"Retired {len(retired)} partitions{': ' + ', '.join(retired) if retired else ''}")
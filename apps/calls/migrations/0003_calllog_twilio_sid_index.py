@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='calllog',
+            name='twilio_sid',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
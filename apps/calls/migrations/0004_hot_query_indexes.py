@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0003_calllog_twilio_sid_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calllog',
+            index=models.Index(fields=['wakeup_call', '-created_at'], name='calllog_call_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calllog',
+            index=models.Index(fields=['status', '-created_at'], name='calllog_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calllog',
+            index=models.Index(fields=['-created_at'], name='calllog_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wakeupcall',
+            index=models.Index(condition=models.Q(('status__in', ['scheduled', 'active'])), fields=['scheduled_time'], name='wakeupcall_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wakeupcall',
+            index=models.Index(fields=['user', 'status', 'scheduled_time'], name='wakeupcall_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wakeupcall',
+            index=models.Index(fields=['user', '-created_at'], name='wakeupcall_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wakeupcall',
+            index=models.Index(fields=['status', 'scheduled_time'], name='wakeupcall_status_time_idx'),
+        ),
+    ]
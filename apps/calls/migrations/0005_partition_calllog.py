@@ -0,0 +1,124 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:02
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+from apps.calls.partitions import DEFAULT_PARTITION, TABLE, add_months, create_partitions, is_partitioned, month_start
+
+LEGACY = f'{TABLE}_unpartitioned'
+PARTITIONED = f'{TABLE}_partitioned'
+
+
+def partition_calllog(apps, schema_editor):
+    """Rebuild calls_calllog as a table range-partitioned by month on created_at.
+    
+    A partitioned table's primary key must include the partition key, so
+    the key becomes (id, created_at); Django keeps treating ``id`` alone as
+    the primary key, which stays unique because it comes from a sequence.
+    Indexes and foreign keys are recreated with their existing names.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+            [TABLE, f'{TABLE}_pkey']
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [TABLE]
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT min(created_at), max(id) FROM "{TABLE}"')
+        oldest, max_id = cursor.fetchone()
+        
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY}"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY}" INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+    
+    now = timezone.now()
+    create_partitions(
+        connection,
+        month_start(oldest or now),
+        add_months(month_start(now), settings.CALLLOG_PARTITION_MONTHS_AHEAD),
+    )
+    
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{LEGACY}"')
+        cursor.execute(f'DROP TABLE "{LEGACY}"')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, created_at)')
+        
+        # The identity sequence went away with the old table
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}".id')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(\'"{TABLE}_id_seq"\')')
+        if max_id:
+            cursor.execute(f'SELECT setval(\'"{TABLE}_id_seq"\', %s)', [max_id])
+        
+        for indexdef in indexes:
+            cursor.execute(indexdef)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+
+def unpartition_calllog(apps, schema_editor):
+    """Rebuild calls_calllog as a plain table with the rows of its attached partitions.
+    
+    Months already retired (dropped) stay gone; restore them from their
+    archives afterwards if needed.
+    """
+    connection = schema_editor.connection
+    if not is_partitioned(connection):
+        return
+    
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+            [TABLE, f'{TABLE}_pkey']
+        )
+        # Partitioned indexes are defined ON ONLY the parent
+        indexes = [row[0].replace(' ON ONLY ', ' ON ', 1) for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [TABLE]
+        )
+        foreign_keys = cursor.fetchall()
+        
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{PARTITIONED}"')
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{PARTITIONED}")')
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{PARTITIONED}"')
+        cursor.execute(f'DROP TABLE "{PARTITIONED}"')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id)')
+        
+        # Back to the identity column Django created; the sequence went with the partitioned table
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), max(id)) FROM \"{TABLE}\" HAVING max(id) IS NOT NULL",
+            [TABLE]
+        )
+        
+        for indexdef in indexes:
+            cursor.execute(indexdef)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('calls', '0004_hot_query_indexes'),
+    ]
+    
+    operations = [
+        migrations.RunPython(partition_calllog, unpartition_calllog),
+    ]
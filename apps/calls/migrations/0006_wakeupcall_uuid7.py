@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:32
+
+import apps.core.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0005_partition_calllog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='wakeupcall',
+            name='id',
+            field=models.UUIDField(default=apps.core.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0006_wakeupcall_uuid7'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='calllog',
+            name='calllog_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='calllog',
+            index=models.Index(fields=['-created_at', '-id'], name='calllog_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wakeupcall',
+            index=models.Index(fields=['user', 'scheduled_time', 'id'], name='wakeupcall_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wakeupcall',
+            index=models.Index(fields=['scheduled_time', 'id'], name='wakeupcall_time_idx'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:43
+
+from django.db import migrations, models
+import django.utils.timezone
+
+TOMBSTONE_TABLE = 'calls_tombstone'
+
+# Table -> SELECT of (kind, object_id, owner_id) for the deleted rows. Call
+# logs are deleted before their wake-up call, so the owner can be joined.
+DELETED_ROWS = {
+    'calls_wakeupcall': "SELECT 'wakeup_call', id::text, user_id FROM old_rows",
+    'calls_calllog': (
+        "SELECT 'call_log', old_rows.id::text, call.user_id FROM old_rows "
+        "JOIN calls_wakeupcall call ON call.id = old_rows.wakeup_call_id"
+    ),
+}
+
+
+def create_triggers(apps, schema_editor):
+    """Record deletions with one INSERT per DELETE statement."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    with schema_editor.connection.cursor() as cursor:
+        for table, deleted in DELETED_ROWS.items():
+            function = f"{TOMBSTONE_TABLE}_{table}"
+            # clock_timestamp(), not now(): the transaction start could be
+            # older than the change feed's settle window
+            cursor.execute(f"""
+                CREATE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+                BEGIN
+                    INSERT INTO {TOMBSTONE_TABLE} (kind, object_id, owner_id, deleted_at)
+                    SELECT deleted.*, clock_timestamp() FROM ({deleted}) AS deleted;
+                    RETURN NULL;
+                END $$;
+            """)
+            cursor.execute(
+                f"CREATE TRIGGER {function}_delete AFTER DELETE ON {table} "
+                f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+            )
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    with schema_editor.connection.cursor() as cursor:
+        for table in DELETED_ROWS:
+            function = f"{TOMBSTONE_TABLE}_{table}"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {function}_delete ON {table}")
+            cursor.execute(f"DROP FUNCTION IF EXISTS {function}()")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0007_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('wakeup_call', 'Wake-up call'), ('call_log', 'Call log')], max_length=12)),
+                ('object_id', models.CharField(max_length=36)),
+                ('owner_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='calllog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='calllog',
+            index=models.Index(fields=['updated_at', 'id'], name='calllog_changed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wakeupcall',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='wakeupcall_user_changed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wakeupcall',
+            index=models.Index(fields=['updated_at', 'id'], name='wakeupcall_changed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['owner_id', 'deleted_at', 'id'], name='tombstone_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0008_change_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inboundcall',
+            index=models.Index(fields=['-created_at', '-id'], name='inboundcall_created_idx'),
+        ),
+    ]
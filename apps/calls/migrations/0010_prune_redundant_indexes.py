@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('calls', '0009_inboundcall_created_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='calllog',
+            name='calllog_call_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='wakeupcall',
+            name='wakeupcall_user_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='wakeupcall',
+            name='wakeupcall_status_time_idx',
+        ),
+        migrations.AlterField(
+            model_name='wakeupcall',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='wakeup_calls', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -1,11 +1,88 @@
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.db import connections, models, router, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-import uuid
+
+from apps.core.uuids import uuid7
+from apps.core.versions import abump_user_versions, bump_user_versions
+from .events import apublish_call_events, publish_call_events
 
 User = get_user_model()
 
 
+class WakeUpCallQuerySet(models.QuerySet):
+    
+    def transition(self, from_statuses, **changes):
+        """Apply ``changes`` to the rows still in ``from_statuses`` (any status if None).
+        
+        Issues a single ``UPDATE ... WHERE status IN (...)`` that writes only
+        the given columns and ``updated_at``, without ``post_save``. Returns the
+        number of rows changed: 0 means another writer moved them first, so
+        a cancel can never be overwritten by a racing completion. When anything
+        changed, the owners' data versions are bumped and a call event is
+        published for each changed row.
+        """
+        changed = self._transition_rows(from_statuses, changes)
+        if changed:
+            bump_user_versions({user_id for _, user_id in changed})
+            publish_call_events([(pk, user_id, changes) for pk, user_id in changed])
+        return len(changed)
+    
+    async def atransition(self, from_statuses, **changes):
+        changed = await sync_to_async(self._transition_rows)(from_statuses, changes)
+        if changed:
+            await abump_user_versions({user_id for _, user_id in changed})
+            await apublish_call_events([(pk, user_id, changes) for pk, user_id in changed])
+        return len(changed)
+    
+    def _transition_rows(self, from_statuses, changes):
+        """Update the matching rows; return the ``(id, user_id)`` of each one changed.
+        
+        On PostgreSQL this is one ``UPDATE ... RETURNING``. Elsewhere the rows
+        are locked and collected before the update: ``changes`` may touch the
+        very columns the filter matches on, so the filter cannot find them
+        again afterwards.
+        """
+        changes = {**changes, 'updated_at': timezone.now()}
+        using = self._db or router.db_for_write(self.model, **self._hints)
+        if connections[using].vendor == 'postgresql':
+            return self._update_returning(using, from_statuses, changes)
+        queryset = self if from_statuses is None else self.filter(status__in=from_statuses)
+        with transaction.atomic(using=using):
+            changed = list(queryset.select_for_update().values_list('id', 'user_id'))
+            if changed:
+                # Rows another writer moved before the lock are no longer
+                # selected; the filter still guards the update itself
+                queryset.filter(pk__in=[pk for pk, _ in changed]).update(**changes)
+        return changed
+    
+    def _update_returning(self, using, from_statuses, changes):
+        connection = connections[using]
+        quote_name = connection.ops.quote_name
+        meta = self.model._meta
+        assignments, params = [], []
+        for name, value in changes.items():
+            field = meta.get_field(name)
+            assignments.append(f'{quote_name(field.column)} = %s')
+            params.append(field.get_db_prep_save(value, connection))
+        selected, selected_params = self.order_by().values('pk').query.get_compiler(using).as_sql()
+        conditions = [f'{quote_name(meta.pk.column)} IN ({selected})']
+        params.extend(selected_params)
+        # On the updated table itself, so a row another writer moves first
+        # is checked again after its lock is released
+        if from_statuses is not None:
+            conditions.append(f'{quote_name(meta.get_field("status").column)} = ANY(%s)')
+            params.append(list(from_statuses))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {quote_name(meta.db_table)} SET {", ".join(assignments)} '
+                f'WHERE {" AND ".join(conditions)} '
+                f'RETURNING {quote_name(meta.pk.column)}, {quote_name(meta.get_field("user").column)}',
+                params,
+            )
+            return cursor.fetchall()
+
+
 class WakeUpCall(models.Model):
     """Model for managing wake-up calls."""
     STATUS_CHOICES = [
@@ -16,13 +93,20 @@ class WakeUpCall(models.Model):
         ('failed', 'Failed'),
     ]
     
+    # Calls that have not run yet: the dispatcher picks them up, users can
+    # still cancel or change them
+    PENDING_STATUSES = ('scheduled', 'active')
+    
     CONTACT_METHOD_CHOICES = [
         ('call', 'Phone Call'),
         ('sms', 'Text Message'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wakeup_calls')
+    # Time-ordered, so inserts append to the primary key and CallLog
+    # foreign key indexes; rows created before this are uuid4
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    # Indexed by wakeupcall_user_time_idx, which leads with user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wakeup_calls', db_index=False)
     scheduled_time = models.DateTimeField()
     phone_number = models.CharField(max_length=17)
     contact_method = models.CharField(max_length=4, choices=CONTACT_METHOD_CHOICES)
@@ -34,15 +118,38 @@ class WakeUpCall(models.Model):
     last_executed = models.DateTimeField(null=True, blank=True)
     next_execution = models.DateTimeField(null=True, blank=True)
     
+    objects = WakeUpCallQuerySet.as_manager()
+    
     class Meta:
         ordering = ['scheduled_time']
+        indexes = [
+            # Dispatcher, admin home: pending calls in time order, and nothing else
+            models.Index(
+                fields=['scheduled_time'],
+                name='wakeupcall_due_idx',
+                condition=models.Q(status__in=['scheduled', 'active']),
+            ),
+            # API keyset pages, home and inbound next calls, user deletes: a user's calls in time order
+            models.Index(fields=['user', 'scheduled_time', 'id'], name='wakeupcall_user_time_idx'),
+            # Dashboard: a user's most recent calls
+            models.Index(fields=['user', '-created_at'], name='wakeupcall_user_created_idx'),
+            # Admin changelist and keyset pages: all calls in time order
+            models.Index(fields=['scheduled_time', 'id'], name='wakeupcall_time_idx'),
+            # Change feed: a user's changed calls, and all calls for admins
+            models.Index(fields=['user', 'updated_at', 'id'], name='wakeupcall_user_changed_idx'),
+            models.Index(fields=['updated_at', 'id'], name='wakeupcall_changed_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.scheduled_time} ({self.contact_method})"
 
 
 class CallLog(models.Model):
-    """Log all call attempts and interactions."""
+    """Log all call attempts and interactions.
+    
+    On PostgreSQL the table is range-partitioned by month on ``created_at``
+    (see ``apps.calls.partitions``).
+    """
     STATUS_CHOICES = [
         ('initiated', 'Initiated'),
         ('completed', 'Completed'),
@@ -51,16 +158,26 @@ class CallLog(models.Model):
         ('busy', 'Busy'),
     ]
     
+    # The foreign key index also serves a call's attempts; there are few
     wakeup_call = models.ForeignKey(WakeUpCall, on_delete=models.CASCADE, related_name='logs')
     status = models.CharField(max_length=12, choices=STATUS_CHOICES)
-    twilio_sid = models.CharField(max_length=100, blank=True, null=True)
+    twilio_sid = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     duration = models.IntegerField(null=True, blank=True, help_text="Duration in seconds")
     error_message = models.TextField(blank=True)
     weather_data = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Admin stats and changelist filters
+            models.Index(fields=['status', '-created_at'], name='calllog_status_created_idx'),
+            # Admin changelist default ordering, API keyset pages
+            models.Index(fields=['-created_at', '-id'], name='calllog_created_idx'),
+            # Change feed
+            models.Index(fields=['updated_at', 'id'], name='calllog_changed_idx'),
+        ]
     
     def __str__(self):
         return f"{self.wakeup_call.user.username} - {self.status} - {self.created_at}"
@@ -79,6 +196,43 @@ class InboundCall(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Admin changelist default ordering
+            models.Index(fields=['-created_at', '-id'], name='inboundcall_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.from_number} -> {self.to_number} ({self.status})"
+
+
+class Tombstone(models.Model):
+    """A deleted wake-up call or call log, kept for the change feed.
+    
+    On PostgreSQL rows are written by statement-level delete triggers, so a
+    bulk or cascading delete adds its tombstones with one INSERT; other
+    databases write them from ``post_delete`` (see ``apps.calls.changes``).
+    """
+    WAKEUP_CALL = 'wakeup_call'
+    CALL_LOG = 'call_log'
+    
+    KIND_CHOICES = [
+        (WAKEUP_CALL, 'Wake-up call'),
+        (CALL_LOG, 'Call log'),
+    ]
+    
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    object_id = models.CharField(max_length=36)
+    # Plain column rather than a foreign key: deleting a user deletes the
+    # calls first, and their tombstones must not block the user's delete
+    owner_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            # Change feed: a user's deletions, and all deletions for admins
+            models.Index(fields=['owner_id', 'deleted_at', 'id'], name='tombstone_owner_idx'),
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted {self.deleted_at}"
@@ -0,0 +1,143 @@
+"""
+Monthly range partitions for the CallLog table (PostgreSQL only).
+
+``calls_calllog`` is partitioned by ``created_at``, one partition per month
+(``calls_calllog_pYYYY_MM``) plus a default partition that catches rows
+outside every range. Partitions are created ahead of time by
+``manage_calllog_partitions`` / the ``maintain_calllog_partitions`` task,
+and months past retention are retired by detaching and dropping their
+partition, which is O(1) regardless of how many rows it holds (see
+``apps.core.archival.retire_calllog_partitions``).
+"""
+import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'calls_calllog'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+_PARTITION_NAME = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+
+def month_start(value):
+    """Return midnight UTC on the first day of ``value``'s month."""
+    value = value.astimezone(dt_timezone.utc) if value.tzinfo else value
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def is_partitioned(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(connection):
+    """Return ``{month: partition name}`` for the attached monthly partitions."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    
+    partitions = {}
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions[datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)] = name
+    return partitions
+
+
+def list_detached_partitions(connection):
+    """Return the names of monthly partition tables no longer attached to CallLog."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class "
+            "WHERE relkind = 'r' AND NOT relispartition AND relnamespace = current_schema()::regnamespace "
+            "AND relname LIKE %s",
+            [f'{TABLE}_p%']
+        )
+        return sorted(name for name, in cursor.fetchall() if _PARTITION_NAME.match(name))
+
+
+def expired_partitions(connection, before):
+    """Names of the monthly partitions for months before ``before``'s month, and of any detached ones."""
+    cutoff = month_start(before)
+    attached = [name for month, name in sorted(list_partitions(connection).items()) if month < cutoff]
+    return attached + list_detached_partitions(connection)
+
+
+def create_partitions(connection, start, end):
+    """Create monthly partitions for every month from ``start`` to ``end`` inclusive."""
+    existing = list_partitions(connection)
+    created = []
+    month = month_start(start)
+    last = month_start(end)
+    
+    while month <= last:
+        if month not in existing:
+            name = partition_name(month)
+            bounds = [month, add_months(month, 1)]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE created_at >= %s AND created_at < %s)',
+                    bounds
+                )
+                if cursor.fetchone()[0]:
+                    _create_from_default(connection, name, bounds)
+                else:
+                    cursor.execute(
+                        f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)', bounds
+                    )
+            created.append(name)
+        month = add_months(month, 1)
+    
+    if created:
+        logger.info(f"Created CallLog partitions: {', '.join(created)}")
+    return created
+
+
+def _create_from_default(connection, name, bounds):
+    """Create a partition for rows the default partition already holds.
+    
+    A partition cannot be created while the default partition has rows in
+    its range, so they are moved into a new table that is then attached.
+    The rows move between partitions directly, so CallLog's statement
+    triggers (tombstones, dashboard counters) do not see them.
+    """
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE created_at >= %s AND created_at < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            bounds
+        )
+        moved = cursor.rowcount
+        cursor.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', bounds)
+    logger.info(f"Moved {moved} rows from {DEFAULT_PARTITION} to {name}")
+
+
+def drop_partition(connection, name):
+    """Detach (if still attached) and drop a monthly partition."""
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if name in list_partitions(connection).values():
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+        cursor.execute(f'DROP TABLE "{name}"')
@@ -1,6 +1,7 @@
 """
 Twilio and weather services for wake-up calls.
 """
+import aiohttp
 import requests
 import logging
 from twilio.rest import Client
@@ -109,38 +110,56 @@ class WeatherService:
         self.api_key = api_key or settings.WEATHER_API_KEY
         self.base_url = "http://api.openweathermap.org/data/2.5/weather"
     
+    def _params(self, zip_code):
+        return {
+            'zip': f"{zip_code},US",
+            'appid': self.api_key,
+            'units': 'imperial'
+        }
+    
+    def _parse(self, data):
+        return {
+            'temperature': data['main']['temp'],
+            'description': data['weather'][0]['description'],
+            'humidity': data['main']['humidity'],
+            'feels_like': data['main']['feels_like'],
+            'location': data['name']
+        }
+    
+    def _unavailable(self):
+        return {
+            'temperature': 'N/A',
+            'description': 'Weather unavailable',
+            'humidity': 'N/A',
+            'feels_like': 'N/A',
+            'location': 'Unknown'
+        }
+    
     def get_weather_by_zip(self, zip_code):
         """Get current weather by zip code."""
         try:
-            params = {
-                'zip': f"{zip_code},US",
-                'appid': self.api_key,
-                'units': 'imperial'
-            }
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = requests.get(self.base_url, params=self._params(zip_code), timeout=10)
             response.raise_for_status()
-            
-            data = response.json()
-            return {
-                'temperature': data['main']['temp'],
-                'description': data['weather'][0]['description'],
-                'humidity': data['main']['humidity'],
-                'feels_like': data['main']['feels_like'],
-                'location': data['name']
-            }
+            return self._parse(response.json())
         except Exception as e:
             logger.error(f"Failed to get weather: {e}")
-            return {
-                'temperature': 'N/A',
-                'description': 'Weather unavailable',
-                'humidity': 'N/A',
-                'feels_like': 'N/A',
-                'location': 'Unknown'
-            }
+            return self._unavailable()
+    
+    async def aget_weather_by_zip(self, zip_code):
+        """Get current weather by zip code without blocking the event loop."""
+        try:
+            timeout = aiohttp.ClientTimeout(total=10)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(self.base_url, params=self._params(zip_code)) as response:
+                    response.raise_for_status()
+                    return self._parse(await response.json())
+        except Exception as e:
+            logger.error(f"Failed to get weather: {e}")
+            return self._unavailable()
 
 
-def generate_voice_response(weather_data, wakeup_call):
-    """Generate TwiML response for voice calls."""
+def build_voice_response(weather_data, wakeup_call):
+    """Build the TwiML response with the Twilio element tree (reference renderer)."""
     response = VoiceResponse()
     
     # Wake-up message
@@ -182,8 +201,8 @@ def generate_voice_response(weather_data, wakeup_call):
     return str(response)
 
 
-def generate_sms_message(weather_data, wakeup_call):
-    """Generate SMS message with weather."""
+def build_sms_message(weather_data, wakeup_call):
+    """Build the SMS message by incremental concatenation (reference renderer)."""
     message = f"Good morning! Your wake-up call at {wakeup_call.scheduled_time.strftime('%I:%M %p')}."
     
     if weather_data:
@@ -195,3 +214,75 @@ def generate_sms_message(weather_data, wakeup_call):
     message += " Reply STOP to cancel, CHANGE to modify time, or METHOD to switch between call/text."
     
     return message
+
+
+# Precompiled TwiML/SMS fragments. The static parts of every message are
+# assembled once at import time; only the variable slots are filled (and
+# XML-escaped) per render. Output is byte-identical to the builders above.
+_VOICE_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?><Response>'
+    '<Say voice="alice">Good morning! This is your wake-up call scheduled for '
+)
+_VOICE_WEATHER = '.</Say><Say voice="alice">The current temperature in '
+_VOICE_TAIL = (
+    '</Say><Say voice="alice">Press 1 to change your next wake-up time. '
+    'Press 2 to cancel all wake-up calls. Press 3 to switch between call and text message. '
+    'Press 0 to hang up.</Say>'
+    '<Gather action="/calls/handle-voice-input/" method="POST" numDigits="1" timeout="10" />'
+    '<Say voice="alice">Thank you for using our wake-up call service. Have a great day!</Say>'
+    '<Hangup /></Response>'
+)
+_VOICE_NO_WEATHER_TAIL = '.' + _VOICE_TAIL
+
+_SMS_HEAD = "Good morning! Your wake-up call at "
+_SMS_TAIL = " Reply STOP to cancel, CHANGE to modify time, or METHOD to switch between call/text."
+
+_SMS_REPLY_HEAD = '<?xml version="1.0" encoding="UTF-8"?><Response><Message>'
+_SMS_REPLY_TAIL = '</Message></Response>'
+
+_XML_TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+
+def xml_text(value):
+    """Escape a value for use as XML character data (same rules as ElementTree)."""
+    text = str(value)
+    if '&' in text or '<' in text or '>' in text:
+        return text.translate(_XML_TEXT_ESCAPES)
+    return text
+
+
+def generate_voice_response(weather_data, wakeup_call):
+    """Generate TwiML response for voice calls."""
+    scheduled = xml_text(wakeup_call.scheduled_time.strftime('%I:%M %p'))
+    
+    if not weather_data:
+        return _VOICE_HEAD + scheduled + _VOICE_NO_WEATHER_TAIL
+    
+    temp = weather_data.get('temperature', 'N/A')
+    description = weather_data.get('description', 'weather unavailable')
+    location = weather_data.get('location', 'your area')
+    
+    return ''.join((
+        _VOICE_HEAD, scheduled, _VOICE_WEATHER,
+        xml_text(f"{location} is {temp} degrees with {description}."),
+        _VOICE_TAIL,
+    ))
+
+
+def generate_sms_message(weather_data, wakeup_call):
+    """Generate SMS message with weather."""
+    scheduled = wakeup_call.scheduled_time.strftime('%I:%M %p')
+    
+    if not weather_data:
+        return f"{_SMS_HEAD}{scheduled}.{_SMS_TAIL}"
+    
+    temp = weather_data.get('temperature', 'N/A')
+    description = weather_data.get('description', 'weather unavailable')
+    location = weather_data.get('location', 'your area')
+    
+    return f"{_SMS_HEAD}{scheduled}. Current weather in {location}: {temp}°F, {description}.{_SMS_TAIL}"
+
+
+def generate_sms_reply(message):
+    """Generate messaging TwiML that answers an inbound SMS with ``message``."""
+    return _SMS_REPLY_HEAD + xml_text(message) + _SMS_REPLY_TAIL
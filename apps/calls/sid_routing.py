@@ -0,0 +1,130 @@
+"""
+Twilio SID routing for webhooks.
+
+Every Twilio webhook identifies its call by SID only. Instead of probing
+each table that may own the SID, the owner's type and primary key are
+cached when the SID is first seen, so a webhook resolves its record with
+a single lookup and issues one targeted write by primary key.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import CallLog, InboundCall
+
+CALL_LOG = 'call_log'
+INBOUND_CALL = 'inbound_call'
+
+SID_MODELS = {
+    CALL_LOG: CallLog,
+    INBOUND_CALL: InboundCall,
+}
+
+# Models whose updated_at must be set by queryset updates (read by the change feed)
+TIMESTAMPED_KINDS = {CALL_LOG}
+
+CACHE_PREFIX = 'twilio-sid:'
+
+
+def register_sid(sid, kind, pk):
+    """Remember which record owns a Twilio SID."""
+    if sid:
+        cache.set(f"{CACHE_PREFIX}{sid}", (kind, pk), settings.TWILIO_SID_CACHE_TIMEOUT)
+
+
+def resolve_sid(sid):
+    """Return ``(kind, pk)`` for the record owning ``sid``, or ``None``."""
+    if not sid:
+        return None
+    
+    route = cache.get(f"{CACHE_PREFIX}{sid}")
+    if route:
+        return tuple(route)
+    
+    # Cache miss: fall back to the indexed SID columns
+    pk = CallLog.objects.filter(twilio_sid=sid).values_list('pk', flat=True).first()
+    if pk is not None:
+        route = (CALL_LOG, pk)
+    else:
+        pk = InboundCall.objects.filter(twilio_call_sid=sid).values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        route = (INBOUND_CALL, pk)
+    
+    register_sid(sid, *route)
+    return route
+
+
+def resolve_sids(sids):
+    """Return ``{sid: (kind, pk)}`` for every known SID in ``sids``."""
+    keys = {f"{CACHE_PREFIX}{sid}": sid for sid in set(sids) if sid}
+    routes = {keys[key]: tuple(route) for key, route in cache.get_many(keys).items()}
+    
+    # Cache misses: one indexed IN query per owning table
+    found = {}
+    missing = [sid for sid in keys.values() if sid not in routes]
+    if missing:
+        for pk, sid in CallLog.objects.filter(twilio_sid__in=missing).values_list('pk', 'twilio_sid'):
+            found[sid] = (CALL_LOG, pk)
+        missing = [sid for sid in missing if sid not in found]
+    if missing:
+        for pk, sid in InboundCall.objects.filter(twilio_call_sid__in=missing).values_list('pk', 'twilio_call_sid'):
+            found[sid] = (INBOUND_CALL, pk)
+    
+    if found:
+        cache.set_many({f"{CACHE_PREFIX}{sid}": route for sid, route in found.items()}, settings.TWILIO_SID_CACHE_TIMEOUT)
+    routes.update(found)
+    return routes
+
+
+def with_updated_at(kind, fields):
+    """``fields`` plus ``updated_at`` for models whose updates the change feed reads."""
+    if kind in TIMESTAMPED_KINDS:
+        return {**fields, 'updated_at': timezone.now()}
+    return fields
+
+
+def update_by_sid(sid, **fields):
+    """Apply ``fields`` to the record owning ``sid``. Returns rows updated."""
+    route = resolve_sid(sid)
+    if not route:
+        return 0
+    kind, pk = route
+    return SID_MODELS[kind].objects.filter(pk=pk).update(**with_updated_at(kind, fields))
+
+
+async def aregister_sid(sid, kind, pk):
+    """Async version of ``register_sid``."""
+    if sid:
+        await cache.aset(f"{CACHE_PREFIX}{sid}", (kind, pk), settings.TWILIO_SID_CACHE_TIMEOUT)
+
+
+async def aresolve_sid(sid):
+    """Async version of ``resolve_sid``."""
+    if not sid:
+        return None
+    
+    route = await cache.aget(f"{CACHE_PREFIX}{sid}")
+    if route:
+        return tuple(route)
+    
+    pk = await CallLog.objects.filter(twilio_sid=sid).values_list('pk', flat=True).afirst()
+    if pk is not None:
+        route = (CALL_LOG, pk)
+    else:
+        pk = await InboundCall.objects.filter(twilio_call_sid=sid).values_list('pk', flat=True).afirst()
+        if pk is None:
+            return None
+        route = (INBOUND_CALL, pk)
+    
+    await aregister_sid(sid, *route)
+    return route
+
+
+async def aupdate_by_sid(sid, **fields):
+    """Async version of ``update_by_sid``."""
+    route = await aresolve_sid(sid)
+    if not route:
+        return 0
+    kind, pk = route
+    return await SID_MODELS[kind].objects.filter(pk=pk).aupdate(**with_updated_at(kind, fields))
@@ -0,0 +1,144 @@
+"""
+Write-behind buffer for Twilio status callbacks.
+
+Twilio sends several status callbacks per call (initiated, ringing,
+answered, completed). Instead of writing each one to the database while
+Twilio waits, the webhook appends it to a Redis stream and returns
+immediately. A flusher reads the stream in batches, keeps only the latest
+status and duration per SID, and applies them with ``bulk_update``.
+
+A batch the database rejects is retried one SID at a time; callbacks that
+still fail are moved to a dead-letter stream, so one bad entry cannot hold
+up the rest of the stream.
+"""
+import logging
+import socket
+
+import redis
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+
+from .redis_clients import get_async_client, get_client
+from .sid_routing import SID_MODELS, TIMESTAMPED_KINDS, resolve_sids, with_updated_at
+
+logger = logging.getLogger(__name__)
+
+GROUP = 'status-flusher'
+
+# CallStatus values Twilio sends; anything else is rejected by the webhook
+CALL_STATUSES = ('queued', 'initiated', 'ringing', 'in-progress', 'completed', 'busy', 'failed', 'no-answer', 'canceled')
+
+# Errors caused by the callback's own data rather than the database being
+# unavailable; retrying the same entry can never succeed
+REJECTED = (DataError, IntegrityError)
+
+
+async def aenqueue_status(sid, status, duration):
+    """Append a status callback to the stream. Returns False if Redis is unavailable."""
+    try:
+        await get_async_client().xadd(
+            settings.STATUS_BUFFER_STREAM,
+            {'sid': sid, 'status': status, 'duration': duration},
+            maxlen=settings.STATUS_BUFFER_MAX_LENGTH,
+            approximate=True,
+        )
+        return True
+    except redis.RedisError as e:
+        logger.error(f"Failed to buffer status callback for {sid}: {e}")
+        return False
+
+
+def coalesce(entries):
+    """Reduce stream entries to the latest ``(status, duration)`` per SID."""
+    latest = {}
+    for _, fields in entries:
+        if not fields:
+            # Entry deleted after being claimed; nothing left to apply
+            continue
+        sid = fields[b'sid'].decode()
+        latest[sid] = (fields[b'status'].decode(), int(fields[b'duration']))
+    return latest
+
+
+def apply_statuses(latest):
+    """Write coalesced statuses with one ``bulk_update`` per owning table."""
+    routes = resolve_sids(latest)
+    
+    pending = {kind: [] for kind in SID_MODELS}
+    for sid, (status, duration) in latest.items():
+        route = routes.get(sid)
+        if not route:
+            logger.warning(f"Dropping status callback for unknown SID {sid}")
+            continue
+        kind, pk = route
+        fields = with_updated_at(kind, {'status': status, 'duration': duration})
+        pending[kind].append(SID_MODELS[kind](pk=pk, **fields))
+    
+    updated = 0
+    for kind, objs in pending.items():
+        if objs:
+            fields = ['status', 'duration', 'updated_at'] if kind in TIMESTAMPED_KINDS else ['status', 'duration']
+            SID_MODELS[kind].objects.bulk_update(objs, fields)
+            updated += len(objs)
+    return updated
+
+
+class StatusFlusher:
+    """Drain the status stream as a member of the flusher consumer group."""
+    
+    def __init__(self, client=None, consumer=None):
+        self.client = client or get_client()
+        self.stream = settings.STATUS_BUFFER_STREAM
+        self.consumer = consumer or socket.gethostname()
+        try:
+            self.client.xgroup_create(self.stream, GROUP, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        # Start by re-reading entries this consumer claimed but never acked
+        # (e.g. it was restarted mid-batch)
+        self._cursor = '0'
+    
+    @property
+    def caught_up(self):
+        """True once the consumer's unacked backlog has been replayed."""
+        return self._cursor == '>'
+    
+    def flush(self, block_ms=None):
+        """Apply one batch of buffered callbacks. Returns the number of entries consumed."""
+        response = self.client.xreadgroup(
+            GROUP, self.consumer, {self.stream: self._cursor},
+            count=settings.STATUS_BUFFER_BATCH_SIZE,
+            block=block_ms,
+        )
+        entries = response[0][1] if response else []
+        if not entries:
+            # Backlog drained, switch to new entries only
+            self._cursor = '>'
+            return 0
+        
+        latest = coalesce(entries)
+        try:
+            apply_statuses(latest)
+        except REJECTED as e:
+            logger.warning(f"Batch of {len(latest)} status callbacks rejected ({e}); applying them one by one")
+            self._apply_each(latest)
+        
+        ids = [entry_id for entry_id, _ in entries]
+        self.client.xack(self.stream, GROUP, *ids)
+        self.client.xdel(self.stream, *ids)
+        return len(entries)
+    
+    def _apply_each(self, latest):
+        for sid, (status, duration) in latest.items():
+            try:
+                with transaction.atomic():
+                    apply_statuses({sid: (status, duration)})
+            except REJECTED as e:
+                logger.error(f"Dead-lettering status callback for {sid} ({status}, {duration}s): {e}")
+                self.client.xadd(
+                    settings.STATUS_BUFFER_DEAD_LETTER_STREAM,
+                    {'sid': sid, 'status': status, 'duration': duration, 'error': str(e)},
+                    maxlen=settings.STATUS_BUFFER_MAX_LENGTH,
+                    approximate=True,
+                )
@@ -5,8 +5,9 @@ app_name = 'calls'
 
 urlpatterns = [
     path('voice-response/<uuid:wakeup_call_id>/', views.VoiceResponseView.as_view(), name='voice_response'),
-    path('handle-voice-input/', views.handle_voice_input, name='handle_voice_input'),
-    path('inbound-call/', views.handle_inbound_call, name='inbound_call'),
-    path('sms-webhook/', views.handle_sms_webhook, name='sms_webhook'),
-    path('call-status/', views.call_status_webhook, name='call_status'),
+    path('handle-voice-input/', views.VoiceInputView.as_view(), name='handle_voice_input'),
+    path('inbound-call/', views.InboundCallView.as_view(), name='inbound_call'),
+    path('sms-webhook/', views.SMSWebhookView.as_view(), name='sms_webhook'),
+    path('call-status/', views.CallStatusView.as_view(), name='call_status'),
+    path('events/', views.CallEventsView.as_view(), name='events'),
 ]
@@ -1,3 +1,4 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.contrib import messages
@@ -5,30 +6,48 @@ from django.http import HttpResponseForbidden
 
 
 class AdminAccessMiddleware:
-    """Middleware to prevent regular users from accessing admin URLs."""
+    """Middleware to prevent regular users from accessing admin URLs.
+    
+    Sync and async capable, so it does not put the async views' requests
+    through a thread; only admin URLs (sync views anyway) load the user.
+    """
+    sync_capable = True
+    async_capable = True
     
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
         # Check if the request is trying to access admin URLs
         if request.path.startswith('/admin/'):
-            # Allow access if user is not authenticated (will be redirected to login)
-            if not request.user.is_authenticated:
-                pass  # Let Django handle the authentication redirect
-            else:
-                # User is authenticated, check if they're admin
-                try:
-                    is_admin = (hasattr(request.user, 'profile') and 
-                               request.user.profile.role == 'admin')
-                except Exception:
-                    # If profile doesn't exist, treat as regular user
-                    is_admin = False
-                
-                if not is_admin:
-                    # Regular user trying to access admin - redirect to home with error message
-                    messages.error(request, 'Access denied. Admin privileges required.')
-                    return redirect('home')
+            denied = self._deny_regular_user(request)
+            if denied:
+                return denied
         
         response = self.get_response(request)
         return response
+    
+    async def __acall__(self, request):
+        if request.path.startswith('/admin/'):
+            # request.user loads lazily from the session, which is sync-only
+            denied = await sync_to_async(self._deny_regular_user)(request)
+            if denied:
+                return denied
+        
+        return await self.get_response(request)
+    
+    def _deny_regular_user(self, request):
+        # Allow access if user is not authenticated (will be redirected to login)
+        if not request.user.is_authenticated:
+            return None  # Let Django handle the authentication redirect
+        # User is authenticated, check if they're admin
+        if not request.user.is_admin:
+            # Regular user trying to access admin - redirect to home with error message
+            messages.error(request, 'Access denied. Admin privileges required.')
+            return redirect('home')
+        return None
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
+    
+    def ready(self):
+        import apps.core.db_metrics
+        import apps.core.versions
@@ -0,0 +1,233 @@
+"""
+Retention and archival of finished data.
+
+Rows past their retention period are read in keyset-paginated chunks,
+written as gzipped JSON Lines (Django's ``jsonl`` serialization, one file
+per chunk) to a local directory or S3-compatible bucket, and only then
+deleted, one bounded batch per chunk. Expired CallLog partitions are
+archived the same way and then dropped whole. Archived runs can be
+restored.
+"""
+import gzip
+import logging
+from datetime import timedelta
+from pathlib import Path
+
+import boto3
+from django.conf import settings
+from django.core import serializers
+from django.db import transaction
+from django.utils import timezone
+
+from apps.calls import partitions
+from apps.calls.changes import tombstone_table_call_logs
+from apps.calls.models import WakeUpCall, CallLog, InboundCall
+from .models import PhoneVerification
+from .stats import reconcile_dashboard_stats
+
+logger = logging.getLogger(__name__)
+
+FINISHED_CALL_STATUSES = ['completed', 'cancelled', 'failed']
+
+
+def _expired_wakeup_calls(cutoff):
+    return WakeUpCall.objects.filter(status__in=FINISHED_CALL_STATUSES, scheduled_time__lt=cutoff)
+
+
+def _expired_inbound_calls(cutoff):
+    return InboundCall.objects.filter(created_at__lt=cutoff)
+
+
+def _expired_phone_verifications(cutoff):
+    return PhoneVerification.objects.filter(created_at__lt=cutoff)
+
+
+# Dataset name -> (retention setting in days, eligible rows, dependent rows
+# archived and deleted along with each chunk)
+DATASETS = {
+    'wakeup_calls': (
+        'RETENTION_WAKEUP_CALL_DAYS',
+        _expired_wakeup_calls,
+        lambda pks: [CallLog.objects.filter(wakeup_call_id__in=pks)],
+    ),
+    'inbound_calls': ('RETENTION_INBOUND_CALL_DAYS', _expired_inbound_calls, lambda pks: []),
+    'phone_verifications': ('RETENTION_PHONE_VERIFICATION_DAYS', _expired_phone_verifications, lambda pks: []),
+}
+
+
+class LocalArchiveStorage:
+    """Archive files under a local directory."""
+    
+    def __init__(self, root):
+        self.root = Path(root)
+    
+    def write(self, name, data):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_bytes(data)
+        tmp.replace(path)
+    
+    def read(self, name):
+        return (self.root / name).read_bytes()
+    
+    def list(self, prefix):
+        base = self.root / prefix
+        if not base.exists():
+            return []
+        return sorted(str(path.relative_to(self.root)) for path in base.rglob('*.jsonl.gz'))
+
+
+class S3ArchiveStorage:
+    """Archive files in an S3-compatible bucket (``s3://bucket/prefix``)."""
+    
+    def __init__(self, url):
+        bucket, _, prefix = url[len('s3://'):].partition('/')
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = boto3.client(
+            's3',
+            endpoint_url=settings.ARCHIVE_S3_ENDPOINT_URL or None,
+            region_name=settings.AWS_REGION,
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or None,
+        )
+    
+    def _key(self, name):
+        return f"{self.prefix}/{name}" if self.prefix else name
+    
+    def write(self, name, data):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(name), Body=data)
+    
+    def read(self, name):
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(name))['Body'].read()
+    
+    def list(self, prefix):
+        names = []
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            names.extend(obj['Key'][strip:] for obj in page.get('Contents', []))
+        return sorted(name for name in names if name.endswith('.jsonl.gz'))
+
+
+def get_storage(url=None):
+    url = url or settings.ARCHIVE_STORAGE_URL
+    if url.startswith('s3://'):
+        return S3ArchiveStorage(url)
+    return LocalArchiveStorage(url)
+
+
+def archive_dataset(name, storage=None, now=None, batch_size=None, dry_run=False):
+    """Archive and delete the expired rows of one dataset. Returns the number of rows."""
+    setting, expired, dependents = DATASETS[name]
+    days = getattr(settings, setting)
+    if not days:
+        return 0
+    
+    storage = storage or get_storage()
+    now = now or timezone.now()
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = now - timedelta(days=days)
+    run = f"{name}/{now:%Y%m%dT%H%M%S}"
+    
+    total = 0
+    part = 0
+    last_pk = None
+    while True:
+        queryset = expired(cutoff).order_by('pk')
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        rows = list(queryset[:batch_size])
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+        total += len(rows)
+        if dry_run:
+            continue
+        
+        pks = [row.pk for row in rows]
+        children = [obj for related in dependents(pks) for obj in related]
+        
+        # The chunk is durably archived before any of it is deleted
+        part += 1
+        payload = serializers.serialize('jsonl', [*rows, *children])
+        storage.write(f"{run}/part-{part:05d}.jsonl.gz", gzip.compress(payload.encode()))
+        
+        with transaction.atomic():
+            for related in dependents(pks):
+                related.delete()
+            type(rows[0]).objects.filter(pk__in=pks).delete()
+    
+    if total:
+        logger.info(f"{'Would archive' if dry_run else 'Archived'} {total} {name} rows older than {cutoff:%Y-%m-%d} to {run}")
+    return total
+
+
+def archive_table(model, table, run, storage=None, batch_size=None, using=None):
+    """Archive every row of ``table``, holding ``model`` rows, under ``run``. Returns the number of rows.
+    
+    For tables the model does not query itself, such as a single CallLog
+    partition; the files restore into the model's table.
+    """
+    storage = storage or get_storage()
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    pk = model._meta.pk.column
+    
+    total = 0
+    part = 0
+    last_pk = None
+    while True:
+        where = f'WHERE "{pk}" > %s ' if last_pk is not None else ''
+        params = [last_pk] if last_pk is not None else []
+        rows = list(model.objects.using(using).raw(
+            f'SELECT * FROM "{table}" {where}ORDER BY "{pk}" LIMIT %s', [*params, batch_size]
+        ))
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+        total += len(rows)
+        part += 1
+        payload = serializers.serialize('jsonl', rows)
+        storage.write(f"{run}/part-{part:05d}.jsonl.gz", gzip.compress(payload.encode()))
+    return total
+
+
+def retire_calllog_partitions(connection, before, storage=None, batch_size=None):
+    """Archive and drop the CallLog partitions for months before ``before``'s month.
+    
+    Dropping a partition bypasses CallLog's delete triggers, so its logs
+    (expired, no longer changing) are first tombstoned for the change feed
+    and archived, and the dashboard counters are reconciled once the
+    partitions are gone. Partition tables already detached are retired
+    too. Returns the partitions dropped.
+    """
+    storage = storage or get_storage()
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    retired = []
+    for name in partitions.expired_partitions(connection, before):
+        tombstones = tombstone_table_call_logs(connection, name, batch_size)
+        rows = archive_table(CallLog, name, f"call_log_partitions/{name}", storage, batch_size, connection.alias)
+        # Only dropped once durably archived
+        partitions.drop_partition(connection, name)
+        logger.info(f"Retired CallLog partition {name}: archived {rows} rows, wrote {tombstones} tombstones")
+        retired.append(name)
+    
+    if retired:
+        reconcile_dashboard_stats()
+    return retired
+
+
+def restore_archive(prefix, storage=None):
+    """Re-insert every archived row under ``prefix`` (a dataset or a single run)."""
+    storage = storage or get_storage()
+    restored = 0
+    for name in storage.list(prefix):
+        data = gzip.decompress(storage.read(name)).decode()
+        with transaction.atomic():
+            # Raw saves keep the archived primary keys and timestamps
+            for obj in serializers.deserialize('jsonl', data):
+                obj.save()
+                restored += 1
+        logger.info(f"Restored {name}")
+    return restored
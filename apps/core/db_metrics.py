@@ -0,0 +1,76 @@
+"""
+Database connection metrics.
+
+Each process counts the connections it opened and the units of work it
+served (web requests and Celery tasks); with persistent connections most
+units reuse an open connection, so ``reuse_ratio`` approaches 1. The
+server-side view from ``pg_stat_activity`` shows how close all processes
+together are to ``max_connections``.
+"""
+import os
+import threading
+
+from celery.signals import task_prerun
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_lock = threading.Lock()
+_counters = {'connections_opened': 0, 'units_of_work': 0}
+
+
+def _increment(name):
+    with _lock:
+        _counters[name] += 1
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    _increment('connections_opened')
+
+
+@receiver(request_started)
+def count_request(sender, **kwargs):
+    _increment('units_of_work')
+
+
+@task_prerun.connect
+def count_task(sender=None, **kwargs):
+    _increment('units_of_work')
+
+
+def process_metrics():
+    """Connection counters for the current process."""
+    with _lock:
+        counters = dict(_counters)
+    units = counters['units_of_work']
+    return {
+        'pid': os.getpid(),
+        **counters,
+        'reuse_ratio': round(1 - counters['connections_opened'] / units, 3) if units else None,
+        'open_connections': sum(
+            conn.connection is not None for conn in connections.all(initialized_only=True)
+        ),
+        'conn_max_age': {alias: connections.settings[alias]['CONN_MAX_AGE'] for alias in connections},
+    }
+
+
+def server_metrics(alias='default'):
+    """Connections to the database server by state (PostgreSQL only)."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+            "WHERE datname = current_database() GROUP BY 1"
+        )
+        by_state = dict(cursor.fetchall())
+        cursor.execute("SHOW max_connections")
+        max_connections = int(cursor.fetchone()[0])
+    return {
+        'connections': sum(by_state.values()),
+        'by_state': by_state,
+        'max_connections': max_connections,
+    }
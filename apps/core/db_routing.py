@@ -0,0 +1,130 @@
+"""
+Primary/replica database routing.
+
+Writes always go to the primary (``default``). Reads go to a randomly
+chosen replica (``settings.DATABASE_REPLICAS``) only inside a web request
+that ``ReplicaRoutingMiddleware`` has cleared for it: a safe (GET/HEAD/
+OPTIONS) request outside the primary-only paths (Twilio webhooks), from a
+session that has not written recently. Everything else - Celery tasks such
+as the dispatcher, management commands, unsafe requests - reads from the
+primary.
+
+After an authenticated request writes, its session stays on the primary for
+``REPLICA_STICKY_SECONDS`` so the user reads their own writes despite
+replication lag.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+SESSION_KEY = '_primary_db_until'
+
+
+class RoutingState:
+    """Routing decisions for the current request."""
+    
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block, even in a replica-enabled request."""
+    token = _state.set(RoutingState(use_replicas=False))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replicas or not settings.DATABASE_REPLICAS:
+            return PRIMARY
+        return random.choice(settings.DATABASE_REPLICAS)
+    
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            # Later reads in the same request see the write
+            state.use_replicas = False
+        return PRIMARY
+    
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+    
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware:
+    """Allow replica reads for safe requests and keep recent writers on the primary.
+    
+    Sync and async capable: the routing state is a context variable, which
+    async views and the threads they hand sync work to both see.
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
+        state = RoutingState(use_replicas=self._can_use_replicas(request))
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        
+        if state.wrote:
+            self._stick_to_primary(request)
+        return response
+    
+    async def __acall__(self, request):
+        # The session is sync-only; webhooks (unsafe or primary-only) never load it
+        use_replicas = self._may_use_replicas(request) and await sync_to_async(self._is_not_sticky)(request)
+        state = RoutingState(use_replicas=use_replicas)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        
+        if state.wrote:
+            await sync_to_async(self._stick_to_primary)(request)
+        return response
+    
+    def _can_use_replicas(self, request):
+        return self._may_use_replicas(request) and self._is_not_sticky(request)
+    
+    def _may_use_replicas(self, request):
+        if request.method not in SAFE_METHODS:
+            return False
+        return not request.path.startswith(tuple(settings.PRIMARY_DB_PATH_PREFIXES))
+    
+    def _is_not_sticky(self, request):
+        return request.session.get(SESSION_KEY, 0) < time.time()
+    
+    def _stick_to_primary(self, request):
+        if request.user.is_authenticated:
+            request.session[SESSION_KEY] = time.time() + settings.REPLICA_STICKY_SECONDS
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.archival import DATASETS, archive_dataset, get_storage
+
+
+class Command(BaseCommand):
+    help = 'Archive finished calls, call logs, inbound calls and verification codes past retention, then delete them'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset',
+            choices=sorted(DATASETS),
+            action='append',
+            help='Only archive this dataset (repeatable; default: all)'
+        )
+        parser.add_argument(
+            '--storage',
+            help='Archive directory or s3://bucket/prefix (default: ARCHIVE_STORAGE_URL)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Rows per archive file and delete batch (default: ARCHIVE_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the rows that would be archived'
+        )
+    
+    def handle(self, *args, **options):
+        storage = get_storage(options['storage'])
+        
+        for name in options['dataset'] or DATASETS:
+            count = archive_dataset(
+                name,
+                storage=storage,
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+            )
+            verb = 'Would archive' if options['dry_run'] else 'Archived'
+            self.stdout.write(f'{verb} {count} {name}')
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection
+import statistics
+import time
+
+from apps.core.db_metrics import process_metrics
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request latency with a new connection per request and with persistent connections'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Number of simulated requests per mode (default: 500)'
+        )
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=60,
+            help='CONN_MAX_AGE used for the persistent mode (default: 60)'
+        )
+    
+    def handle(self, *args, **options):
+        original_max_age = connection.settings_dict['CONN_MAX_AGE']
+        modes = [
+            ('new connection per request (CONN_MAX_AGE=0)', 0),
+            (f'persistent (CONN_MAX_AGE={options["max_age"]}, '
+             f'health checks {"on" if connection.settings_dict["CONN_HEALTH_CHECKS"] else "off"})', options['max_age']),
+        ]
+        
+        self.stdout.write(f'Simulating {options["requests"]} requests per mode against {connection.vendor}...')
+        try:
+            for label, max_age in modes:
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                opened_before = process_metrics()['connections_opened']
+                timings = self._run(options['requests'])
+                opened = process_metrics()['connections_opened'] - opened_before
+                
+                timings.sort()
+                self.stdout.write(
+                    f'{label}: mean {statistics.mean(timings):.2f}ms, '
+                    f'p50 {timings[len(timings) // 2]:.2f}ms, '
+                    f'p95 {timings[int(len(timings) * 0.95)]:.2f}ms, '
+                    f'{opened} connections opened'
+                )
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = original_max_age
+    
+    def _run(self, requests):
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            # The same connection handling Django does around every request
+            close_old_connections()
+            User.objects.filter(pk=0).exists()
+            close_old_connections()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.archival import get_storage, restore_archive
+
+
+class Command(BaseCommand):
+    help = 'Restore archived rows, e.g. "wakeup_calls/20250101T030000" or a whole dataset'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('prefix', help='Dataset or run to restore')
+        parser.add_argument(
+            '--storage',
+            help='Archive directory or s3://bucket/prefix (default: ARCHIVE_STORAGE_URL)'
+        )
+    
+    def handle(self, *args, **options):
+        storage = get_storage(options['storage'])
+        if not storage.list(options['prefix']):
+            raise CommandError(f"No archive files found under {options['prefix']}")
+        
+        restored = restore_archive(options['prefix'], storage=storage)
+        self.stdout.write(self.style.SUCCESS(f'Restored {restored} rows'))
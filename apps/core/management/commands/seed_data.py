@@ -1,14 +1,65 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
 from django.utils import timezone
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
 import random
 
 from apps.core.models import UserProfile
-from apps.calls.models import WakeUpCall
+from apps.core.phone import normalize_phone_number
+from apps.core.uuids import uuid7
+from apps.calls.models import WakeUpCall, CallLog
 
 User = get_user_model()
 
+# (zip code, timezone, relative population) of the largest US metros
+METRO_ZIP_CODES = [
+    ('10001', 'America/New_York', 88),
+    ('90012', 'America/Los_Angeles', 39),
+    ('60601', 'America/Chicago', 27),
+    ('77002', 'America/Chicago', 23),
+    ('85001', 'America/Phoenix', 16),
+    ('19103', 'America/New_York', 16),
+    ('78205', 'America/Chicago', 14),
+    ('92101', 'America/Los_Angeles', 14),
+    ('75201', 'America/Chicago', 13),
+    ('95113', 'America/Los_Angeles', 10),
+    ('78701', 'America/Chicago', 10),
+    ('32202', 'America/New_York', 9),
+    ('43215', 'America/New_York', 9),
+    ('28202', 'America/New_York', 9),
+    ('46204', 'America/Indiana/Indianapolis', 9),
+    ('98101', 'America/Los_Angeles', 7),
+    ('80202', 'America/Denver', 7),
+    ('37201', 'America/Chicago', 7),
+    ('02108', 'America/New_York', 7),
+    ('30303', 'America/New_York', 5),
+    ('33101', 'America/New_York', 4),
+]
+
+# Popular alarm times (minutes after local midnight) other than 7:00
+ROUND_WAKE_TIMES = [6 * 60, 6 * 60 + 30, 6 * 60 + 45, 7 * 60 + 15, 7 * 60 + 30, 8 * 60]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let ``bulk_create`` keep the timestamps set on the objects instead of now()."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
 
 class Command(BaseCommand):
     help = 'Seed the database with demo users and wake-up calls'
@@ -20,8 +71,41 @@ class Command(BaseCommand):
             default=30,
             help='Number of demo wake-up calls to create (default: 30)'
         )
+        parser.add_argument(
+            '--bulk',
+            type=int,
+            metavar='USERS',
+            help='Generate synthetic load-test data for this many users instead of the demo data'
+        )
+        parser.add_argument(
+            '--calls-per-user',
+            type=float,
+            default=4,
+            help='Average wake-up calls per generated user (default: 4)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Days of call history to generate; calls also extend a week ahead (default: 30)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed; the same seed generates the same data (default: 42)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Users generated and inserted per transaction (default: 5000)'
+        )
     
     def handle(self, *args, **options):
+        if options['bulk']:
+            return self.handle_bulk(options)
+        
         count = options['count']
         
         self.stdout.write(f'Creating {count} demo wake-up calls...')
@@ -142,3 +226,157 @@ class Command(BaseCommand):
         self.stdout.write('- demo_user_2 through demo_user_10 - password: demo123')
         self.stdout.write('\nAdmin user:')
         self.stdout.write('- admin - password: admin123')
+    
+    def handle_bulk(self, options):
+        """Insert synthetic users, profiles, calls and logs with chunked bulk_create.
+        
+        bulk_create sends no post_save signals, so no scheduler rows are
+        written; every call is a demo call. Rows are generated relative to
+        today (UTC), so a seed reproduces the same data on the same day.
+        """
+        users = options['bulk']
+        seed = options['seed']
+        chunk_size = options['chunk_size']
+        if users > 10 ** 7:
+            raise CommandError('At most 10,000,000 users can be generated per seed.')
+        
+        prefix = f'load_{seed}_'
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f'Users for seed {seed} already exist; use another --seed.')
+        
+        rng = random.Random(seed)
+        today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.password = make_password('demo123')
+        self.area_code = 200 + seed % 800
+        self.zip_codes = [(zip_code, ZoneInfo(tz)) for zip_code, tz, _ in METRO_ZIP_CODES]
+        self.zip_weights = [weight for _, _, weight in METRO_ZIP_CODES]
+        self.log_count = 0
+        
+        self.stdout.write(f'Generating {users} users (seed {seed}) in chunks of {chunk_size}...')
+        totals = {'users': 0, 'calls': 0, 'logs': 0}
+        with explicit_timestamps(UserProfile, WakeUpCall, CallLog):
+            for start in range(0, users, chunk_size):
+                with transaction.atomic():
+                    created = self._bulk_chunk(rng, prefix, start, min(start + chunk_size, users), today, options)
+                for key, value in created.items():
+                    totals[key] += value
+                self.stdout.write(
+                    f'{totals["users"]}/{users} users, {totals["calls"]} calls, {totals["logs"]} logs'
+                )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {totals["users"]} users, {totals["calls"]} wake-up calls and {totals["logs"]} call logs '
+            f'(password for every user: demo123)'
+        ))
+    
+    def _bulk_chunk(self, rng, prefix, start, end, today, options):
+        user_rows = []
+        locations = []
+        for i in range(start, end):
+            phone_number = f'+1{self.area_code}{i:07d}'
+            joined = today - timedelta(days=options['days'] + rng.randint(1, 365), seconds=rng.randint(0, 86399))
+            verified = rng.random() < 0.9
+            user_rows.append(User(
+                username=f'{prefix}{i:07d}',
+                email=f'{prefix}{i:07d}@example.com',
+                password=self.password,
+                phone_number=phone_number,
+                # bulk_create skips User.save, which only sets it once verified
+                phone_e164=normalize_phone_number(phone_number) if verified else None,
+                is_phone_verified=verified,
+                date_joined=joined,
+            ))
+            locations.append(rng.choices(self.zip_codes, self.zip_weights)[0])
+        
+        # Primary keys come back from the insert on PostgreSQL and SQLite
+        user_rows = User.objects.bulk_create(user_rows)
+        
+        profiles = []
+        calls = []
+        for user, (zip_code, tz) in zip(user_rows, locations):
+            method = 'sms' if rng.random() < 0.3 else 'call'
+            profiles.append(UserProfile(
+                user=user,
+                zip_code=zip_code,
+                preferred_contact_method=method,
+                timezone=tz.key,
+                created_at=user.date_joined,
+                updated_at=user.date_joined,
+            ))
+            for _ in range(self._calls_for_user(rng, options['calls_per_user'])):
+                calls.append(self._synthetic_call(rng, user, zip_code, tz, method, today, options['days']))
+        UserProfile.objects.bulk_create(profiles)
+        WakeUpCall.objects.bulk_create(calls, batch_size=5000)
+        
+        logs = [log for call in calls for log in self._synthetic_logs(rng, call)]
+        CallLog.objects.bulk_create(logs, batch_size=5000)
+        return {'users': len(user_rows), 'calls': len(calls), 'logs': len(logs)}
+    
+    def _calls_for_user(self, rng, average):
+        # Geometric around the average: most users have a few, some many
+        return int(rng.expovariate(1 / average)) if average > 0 else 0
+    
+    def _wake_minute(self, rng):
+        """Local alarm time in minutes, with a sharp spike at 7:00 AM."""
+        r = rng.random()
+        if r < 0.35:
+            return 7 * 60
+        if r < 0.6:
+            return rng.choice(ROUND_WAKE_TIMES)
+        minute = int(rng.gauss(6.75 * 60, 75))
+        return min(max(minute, 3 * 60), 11 * 60 + 55) // 5 * 5
+    
+    def _synthetic_call(self, rng, user, zip_code, tz, method, today, days):
+        day = today + timedelta(days=rng.randint(-days, 7))
+        minute = self._wake_minute(rng)
+        local = datetime(day.year, day.month, day.day, minute // 60, minute % 60, tzinfo=tz)
+        scheduled_time = local.astimezone(dt_timezone.utc)
+        created_at = max(scheduled_time - timedelta(hours=rng.uniform(1, 14 * 24)), user.date_joined)
+        
+        if scheduled_time < today:
+            status = rng.choices(['completed', 'failed', 'cancelled'], [85, 5, 10])[0]
+            updated_at = scheduled_time + timedelta(seconds=rng.randint(5, 90))
+            last_executed = scheduled_time if status != 'cancelled' else None
+        else:
+            status = 'scheduled' if rng.random() < 0.93 else 'cancelled'
+            updated_at = created_at
+            last_executed = None
+        
+        return WakeUpCall(
+            id=uuid7(created_at, rng.getrandbits),
+            user=user,
+            scheduled_time=scheduled_time,
+            phone_number=user.phone_number,
+            contact_method=method,
+            zip_code=zip_code,
+            status=status,
+            is_demo=True,
+            created_at=created_at,
+            updated_at=updated_at,
+            last_executed=last_executed,
+        )
+    
+    def _synthetic_logs(self, rng, call):
+        if call.status == 'completed':
+            # Some calls were only answered on a retry
+            statuses = ['completed'] if rng.random() < 0.9 else [rng.choice(['no_answer', 'busy']), 'completed']
+        elif call.status == 'failed':
+            statuses = rng.choice([['failed'], ['no_answer', 'failed']])
+        else:
+            return []
+        
+        logs = []
+        for attempt, status in enumerate(statuses):
+            self.log_count += 1
+            duration = rng.randint(15, 75) if status == 'completed' else 0
+            created_at = call.scheduled_time + timedelta(minutes=2 * attempt, seconds=rng.randint(1, 10))
+            logs.append(CallLog(
+                wakeup_call=call,
+                status=status,
+                twilio_sid=f'CA{self.area_code:08x}{self.log_count:024x}',
+                duration=duration,
+                created_at=created_at,
+                # The final status callback arrives once the call ends
+                updated_at=created_at + timedelta(seconds=duration + rng.randint(1, 5)),
+            ))
+        return logs
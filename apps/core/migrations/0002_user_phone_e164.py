@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, help_text='phone_number normalized to E.164, used for inbound call/SMS lookups', max_length=16, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:15
+
+from django.db import migrations
+
+from apps.core.phone import normalize_phone_number
+
+BATCH_SIZE = 1000
+
+
+def backfill_phone_e164(apps, schema_editor):
+    """Populate phone_e164 of verified users in keyset-paginated batches.
+    
+    Unverified numbers are never indexed, since anyone can type one in.
+    When several verified users share a number only the oldest account
+    gets the normalized value; the others keep NULL so the unique index
+    holds.
+    """
+    User = apps.get_model('core', 'User')
+    assigned = set(
+        User.objects.exclude(phone_e164=None).values_list('phone_e164', flat=True)
+    )
+    last_pk = 0
+    
+    while True:
+        batch = list(
+            User.objects.filter(pk__gt=last_pk, phone_e164=None, is_phone_verified=True)
+            .exclude(phone_number='')
+            .order_by('pk')
+            .only('pk', 'phone_number')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        
+        updated = []
+        for user in batch:
+            phone = normalize_phone_number(user.phone_number)
+            if phone and phone not in assigned:
+                assigned.add(phone)
+                user.phone_e164 = phone
+                updated.append(user)
+        User.objects.bulk_update(updated, ['phone_e164'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_user_phone_e164'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_phone_e164, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,140 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:21
+
+from django.db import migrations, models
+
+STATS_TABLE = 'core_dashboardstats'
+
+# Table -> {counter column: SQL condition on the changed rows}
+COUNTERS = {
+    'core_user': {
+        'total_users': 'TRUE',
+        'verified_users': 'is_phone_verified',
+    },
+    'calls_wakeupcall': {
+        'total_calls': 'TRUE',
+        'scheduled_calls': "status = 'scheduled'",
+        'completed_calls': "status = 'completed'",
+        'failed_calls': "status = 'failed'",
+    },
+    'calls_calllog': {
+        'total_logs': 'TRUE',
+        'successful_calls': "status = 'completed'",
+        'failed_logs': "status = 'failed'",
+        'no_answer_logs': "status = 'no_answer'",
+    },
+}
+
+# Rows seen by each kind of statement, signed +1 (added) / -1 (removed)
+CHANGED_ROWS = {
+    'INSERT': 'SELECT *, 1 AS sign FROM new_rows',
+    'DELETE': 'SELECT *, -1 AS sign FROM old_rows',
+    'UPDATE': 'SELECT *, 1 AS sign FROM new_rows UNION ALL SELECT *, -1 AS sign FROM old_rows',
+}
+
+
+def _apply_delta_sql(table, event):
+    counters = COUNTERS[table]
+    deltas = ', '.join(
+        f"coalesce(sum(sign) FILTER (WHERE {condition}), 0) AS {column}"
+        for column, condition in counters.items()
+    )
+    assignments = ', '.join(f"{column} = stats.{column} + delta.{column}" for column in counters)
+    changed = ' OR '.join(f"delta.{column} <> 0" for column in counters)
+    return (
+        f"UPDATE {STATS_TABLE} AS stats SET {assignments} "
+        f"FROM (SELECT {deltas} FROM ({CHANGED_ROWS[event]}) AS changed) AS delta "
+        f"WHERE stats.id = 1 AND ({changed});"
+    )
+
+
+def create_triggers(apps, schema_editor):
+    """Keep the counters current with one UPDATE per statement.
+    
+    Statement-level triggers with transition tables fold a whole bulk
+    insert/update/delete into a single counter update, instead of locking
+    the counters row once per changed row.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    with schema_editor.connection.cursor() as cursor:
+        for table in COUNTERS:
+            function = f"{STATS_TABLE}_{table}"
+            cursor.execute(f"""
+                CREATE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+                BEGIN
+                    IF TG_OP = 'INSERT' THEN {_apply_delta_sql(table, 'INSERT')}
+                    ELSIF TG_OP = 'DELETE' THEN {_apply_delta_sql(table, 'DELETE')}
+                    ELSE {_apply_delta_sql(table, 'UPDATE')}
+                    END IF;
+                    RETURN NULL;
+                END $$;
+            """)
+            for event, transition in [
+                ('INSERT', 'NEW TABLE AS new_rows'),
+                ('DELETE', 'OLD TABLE AS old_rows'),
+                ('UPDATE', 'NEW TABLE AS new_rows OLD TABLE AS old_rows'),
+            ]:
+                cursor.execute(
+                    f"CREATE TRIGGER {function}_{event.lower()} AFTER {event} ON {table} "
+                    f"REFERENCING {transition} FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+                )
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    with schema_editor.connection.cursor() as cursor:
+        for table in COUNTERS:
+            function = f"{STATS_TABLE}_{table}"
+            for event in ('insert', 'delete', 'update'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {function}_{event} ON {table}")
+            cursor.execute(f"DROP FUNCTION IF EXISTS {function}()")
+
+
+def create_stats_row(apps, schema_editor):
+    """Seed the counters row with exact counts."""
+    DashboardStats = apps.get_model('core', 'DashboardStats')
+    with schema_editor.connection.cursor() as cursor:
+        values = {}
+        for table, counters in COUNTERS.items():
+            columns = ', '.join(
+                f"count(*) FILTER (WHERE {condition})" for condition in counters.values()
+            )
+            cursor.execute(f"SELECT {columns} FROM {table}")
+            values.update(zip(counters, cursor.fetchone()))
+    DashboardStats.objects.create(pk=1, **values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_backfill_user_phone_e164'),
+        ('calls', '0005_partition_calllog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.BigIntegerField(default=0)),
+                ('verified_users', models.BigIntegerField(default=0)),
+                ('total_calls', models.BigIntegerField(default=0)),
+                ('scheduled_calls', models.BigIntegerField(default=0)),
+                ('completed_calls', models.BigIntegerField(default=0)),
+                ('failed_calls', models.BigIntegerField(default=0)),
+                ('total_logs', models.BigIntegerField(default=0)),
+                ('successful_calls', models.BigIntegerField(default=0)),
+                ('failed_logs', models.BigIntegerField(default=0)),
+                ('no_answer_logs', models.BigIntegerField(default=0)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'dashboard stats',
+            },
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+        migrations.RunPython(create_stats_row, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:04
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+backfill_phone_e164 = import_module('apps.core.migrations.0003_backfill_user_phone_e164').backfill_phone_e164
+
+
+def clear_unverified_phone_e164(apps, schema_editor):
+    """Release the numbers held by users who never verified them.
+    
+    Databases backfilled before 0003 became verified-only may have given a
+    number to an unverified account instead of a newer verified one; the
+    backfill runs again so the verified owner gets it.
+    """
+    User = apps.get_model('core', 'User')
+    User.objects.filter(is_phone_verified=False).exclude(phone_e164=None).update(phone_e164=None)
+    backfill_phone_e164(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_dashboard_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, help_text='Verified phone_number normalized to E.164, used for inbound call/SMS lookups', max_length=16, null=True, unique=True),
+        ),
+        migrations.RunPython(clear_unverified_phone_e164, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:26
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+dashboard_stats = import_module('apps.core.migrations.0004_dashboard_stats')
+COUNTERS = dashboard_stats.COUNTERS
+CHANGED_ROWS = dashboard_stats.CHANGED_ROWS
+
+DELTAS_TABLE = 'core_dashboardstatsdelta'
+
+COLUMNS = [column for counters in COUNTERS.values() for column in counters]
+
+
+def _append_delta_sql(table, event):
+    counters = COUNTERS[table]
+    deltas = ', '.join(
+        f"coalesce(sum(sign) FILTER (WHERE {condition}), 0) AS {column}"
+        for column, condition in counters.items()
+    )
+    # Every column: Django's defaults are not database defaults
+    values = ', '.join(f"delta.{column}" if column in counters else '0' for column in COLUMNS)
+    changed = ' OR '.join(f"delta.{column} <> 0" for column in counters)
+    return (
+        f"INSERT INTO {DELTAS_TABLE} ({', '.join(COLUMNS)}) "
+        f"SELECT {values} FROM (SELECT {deltas} FROM ({CHANGED_ROWS[event]}) AS changed) AS delta "
+        f"WHERE {changed};"
+    )
+
+
+def _replace_trigger_functions(schema_editor, delta_sql):
+    with schema_editor.connection.cursor() as cursor:
+        for table in COUNTERS:
+            cursor.execute(f"""
+                CREATE OR REPLACE FUNCTION {dashboard_stats.STATS_TABLE}_{table}() RETURNS trigger LANGUAGE plpgsql AS $$
+                BEGIN
+                    IF TG_OP = 'INSERT' THEN {delta_sql(table, 'INSERT')}
+                    ELSIF TG_OP = 'DELETE' THEN {delta_sql(table, 'DELETE')}
+                    ELSE {delta_sql(table, 'UPDATE')}
+                    END IF;
+                    RETURN NULL;
+                END $$;
+            """)
+
+
+def append_deltas(apps, schema_editor):
+    """Have the counter triggers append deltas instead of updating the counters row.
+    
+    Every writer updating the one counters row queued on its lock until
+    commit, and two transactions touching the counted tables in opposite
+    orders could deadlock on it. Inserts take no lock anyone else waits on.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        _replace_trigger_functions(schema_editor, _append_delta_sql)
+
+
+def update_counters_row(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    _replace_trigger_functions(schema_editor, dashboard_stats._apply_delta_sql)
+    DashboardStats = apps.get_model('core', 'DashboardStats')
+    DashboardStatsDelta = apps.get_model('core', 'DashboardStatsDelta')
+    pending = DashboardStatsDelta.objects.aggregate(**{column: models.Sum(column) for column in COLUMNS})
+    DashboardStats.objects.filter(pk=1).update(**{
+        column: models.F(column) + value for column, value in pending.items() if value
+    })
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('core', '0005_user_phone_e164_verified_only'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStatsDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.BigIntegerField(default=0)),
+                ('verified_users', models.BigIntegerField(default=0)),
+                ('total_calls', models.BigIntegerField(default=0)),
+                ('scheduled_calls', models.BigIntegerField(default=0)),
+                ('completed_calls', models.BigIntegerField(default=0)),
+                ('failed_calls', models.BigIntegerField(default=0)),
+                ('total_logs', models.BigIntegerField(default=0)),
+                ('successful_calls', models.BigIntegerField(default=0)),
+                ('failed_logs', models.BigIntegerField(default=0)),
+                ('no_answer_logs', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(append_deltas, update_counters_row),
+    ]
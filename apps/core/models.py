@@ -1,8 +1,12 @@
 from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.db import models
+from django.utils.functional import cached_property
 from django.core.validators import RegexValidator
 import uuid
 
+from .phone import normalize_phone_number, phone_number_in_use
+
 
 class User(AbstractUser):
     """Custom user model with phone verification."""
@@ -12,8 +16,42 @@ class User(AbstractUser):
     )
     
     phone_number = models.CharField(validators=[phone_regex], max_length=17, blank=True)
+    phone_e164 = models.CharField(
+        max_length=16, unique=True, null=True, blank=True, editable=False,
+        help_text="Verified phone_number normalized to E.164, used for inbound call/SMS lookups"
+    )
     is_phone_verified = models.BooleanField(default=False)
     
+    def clean(self):
+        super().clean()
+        if self.is_phone_verified and phone_number_in_use(self.phone_number, self):
+            raise ValidationError({'phone_number': "Another user has already verified this phone number."})
+    
+    def save(self, *args, **kwargs):
+        # Only a verified number routes inbound calls and SMS to this user
+        self.phone_e164 = normalize_phone_number(self.phone_number) if self.is_phone_verified else None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'phone_number', 'is_phone_verified'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'phone_e164'}
+        super().save(*args, **kwargs)
+    
+    @cached_property
+    def role(self):
+        """Profile role, resolved once per user instance (None without a profile).
+        
+        The request user is loaded with its profile by
+        ``apps.core.backends.ProfileModelBackend``, so this costs no query
+        there. Saving or deleting the profile clears the cached value.
+        """
+        try:
+            return self.profile.role
+        except ObjectDoesNotExist:
+            return None
+    
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+    
     def __str__(self):
         return self.username
 
@@ -42,6 +80,21 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._clear_user_role()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._clear_user_role(forget_profile=True)
+        return result
+    
+    def _clear_user_role(self, forget_profile=False):
+        if UserProfile.user.is_cached(self):
+            self.user.__dict__.pop('role', None)
+            if forget_profile:
+                self.user._state.fields_cache.pop('profile', None)
+    
     def __str__(self):
         return f"{self.user.username} ({self.role})"
 
@@ -60,3 +113,47 @@ class PhoneVerification(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.phone_number}"
+
+
+class DashboardCounters(models.Model):
+    """Admin dashboard counters, as totals or as a change to them."""
+    total_users = models.BigIntegerField(default=0)
+    verified_users = models.BigIntegerField(default=0)
+    total_calls = models.BigIntegerField(default=0)
+    scheduled_calls = models.BigIntegerField(default=0)
+    completed_calls = models.BigIntegerField(default=0)
+    failed_calls = models.BigIntegerField(default=0)
+    total_logs = models.BigIntegerField(default=0)
+    successful_calls = models.BigIntegerField(default=0)
+    failed_logs = models.BigIntegerField(default=0)
+    no_answer_logs = models.BigIntegerField(default=0)
+    
+    class Meta:
+        abstract = True
+
+
+class DashboardStats(DashboardCounters):
+    """Single-row table of admin dashboard counter totals.
+    
+    The current counters are this row plus the pending
+    ``DashboardStatsDelta`` rows, which are periodically folded in by
+    ``apps.core.stats.fold_dashboard_stats`` and reconciled against exact
+    counts by ``apps.core.stats.reconcile_dashboard_stats``.
+    """
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name_plural = 'dashboard stats'
+    
+    def __str__(self):
+        return f"Dashboard stats (reconciled {self.reconciled_at})"
+
+
+class DashboardStatsDelta(DashboardCounters):
+    """A change to the dashboard counters not yet folded into ``DashboardStats``.
+    
+    On PostgreSQL statement-level triggers on the user, wake-up call and
+    call log tables append one row per statement (migration 0006). Writers
+    only ever insert here, so they never wait on each other for a shared
+    counters row.
+    """
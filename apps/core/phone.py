@@ -0,0 +1,88 @@
+"""
+Phone number normalization and phone -> user lookup.
+
+Twilio always sends numbers in E.164 (``+15550001234``) while users type
+them in whatever format they like, so lookups go through the normalized
+``User.phone_e164`` column (unique, indexed) and a phone -> user ID cache.
+The column is only set once the user has verified the number, so nobody
+can claim someone else's number, or its inbound calls, by typing it in.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+CACHE_PREFIX = 'phone-user:'
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone_number(value):
+    """Return ``value`` in E.164 form, or ``None`` if it can't be a phone number.
+    
+    Numbers without a country code are assumed to be North American.
+    """
+    if not value:
+        return None
+    
+    digits = _NON_DIGITS.sub('', value)
+    if not value.strip().startswith('+'):
+        if len(digits) == 10:
+            digits = f"1{digits}"
+    
+    if not 8 <= len(digits) <= 15:
+        return None
+    return f"+{digits}"
+
+
+def phone_number_in_use(phone_number, user=None):
+    """Whether a user other than ``user`` has already verified ``phone_number``."""
+    phone = normalize_phone_number(phone_number)
+    if not phone:
+        return False
+    others = get_user_model().objects.filter(phone_e164=phone)
+    if user is not None and user.pk is not None:
+        others = others.exclude(pk=user.pk)
+    return others.exists()
+
+
+def get_user_by_phone(phone_number, queryset=None):
+    """Find the user owning ``phone_number`` with at most one index lookup."""
+    phone = normalize_phone_number(phone_number)
+    if not phone:
+        return None
+    queryset = get_user_model().objects.all() if queryset is None else queryset
+    
+    key = f"{CACHE_PREFIX}{phone}"
+    user_id = cache.get(key)
+    if user_id is not None:
+        # Primary key hit; the phone filter guards against a stale entry
+        user = queryset.filter(pk=user_id, phone_e164=phone).first()
+        if user:
+            return user
+    
+    user = queryset.filter(phone_e164=phone).first()
+    if user:
+        cache.set(key, user.pk, settings.PHONE_LOOKUP_CACHE_TIMEOUT)
+    return user
+
+
+async def aget_user_by_phone(phone_number, queryset=None):
+    """Async version of ``get_user_by_phone``."""
+    phone = normalize_phone_number(phone_number)
+    if not phone:
+        return None
+    queryset = get_user_model().objects.all() if queryset is None else queryset
+    
+    key = f"{CACHE_PREFIX}{phone}"
+    user_id = await cache.aget(key)
+    if user_id is not None:
+        user = await queryset.filter(pk=user_id, phone_e164=phone).afirst()
+        if user:
+            return user
+    
+    user = await queryset.filter(phone_e164=phone).afirst()
+    if user:
+        await cache.aset(key, user.pk, settings.PHONE_LOOKUP_CACHE_TIMEOUT)
+    return user
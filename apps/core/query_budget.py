@@ -0,0 +1,40 @@
+"""
+Query budgets.
+
+``query_budget`` fails when a block runs more database queries than
+allowed, counting every alias so reads routed to a replica are included.
+``apps.api.tests`` applies it to the API endpoints at several page sizes;
+an N+1 shows up as a count that grows with the page size.
+"""
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def capture_queries(using=None):
+    """Collect the queries run inside the block on the ``using`` aliases (all by default).
+    
+    Yields a list that is filled in when the block exits.
+    """
+    queries = []
+    with ExitStack() as stack:
+        contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in using or connections]
+        yield queries
+    for context in contexts:
+        queries.extend(context.captured_queries)
+
+
+@contextmanager
+def query_budget(limit, label='block', using=None):
+    """Raise ``QueryBudgetExceeded`` if the block runs more than ``limit`` queries."""
+    with capture_queries(using) as queries:
+        yield queries
+    if len(queries) > limit:
+        statements = '\n'.join(f'  {query["sql"]}' for query in queries)
+        raise QueryBudgetExceeded(f'{label} ran {len(queries)} queries, budget is {limit}:\n{statements}')
@@ -0,0 +1,156 @@
+"""
+Admin dashboard counters.
+
+The counters are a single ``DashboardStats`` totals row plus the
+``DashboardStatsDelta`` rows database triggers append for every statement
+that changes them, so the dashboard reads a handful of rows no matter how
+large the tables grow, and writers never wait on each other for a counters
+row. ``fold_dashboard_stats`` periodically adds the deltas into the totals.
+``reconcile_dashboard_stats`` compares the counters with exact counts
+(conditional aggregation, one query per table) and records any drift from
+operations that bypass row triggers, such as dropping a partition, as one
+more delta.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.calls.models import WakeUpCall, CallLog
+from .models import DashboardStats, DashboardStatsDelta
+
+User = get_user_model()
+
+STATS_ID = 1
+
+CACHE_KEY = 'admin-dashboard-stats'
+
+# Model -> {counter column: rows counted (None counts every row)}
+COUNTERS = {
+    User: {
+        'total_users': None,
+        'verified_users': Q(is_phone_verified=True),
+    },
+    WakeUpCall: {
+        'total_calls': None,
+        'scheduled_calls': Q(status='scheduled'),
+        'completed_calls': Q(status='completed'),
+        'failed_calls': Q(status='failed'),
+    },
+    CallLog: {
+        'total_logs': None,
+        'successful_calls': Q(status='completed'),
+        'failed_logs': Q(status='failed'),
+        'no_answer_logs': Q(status='no_answer'),
+    },
+}
+
+COLUMNS = [column for counters in COUNTERS.values() for column in counters]
+
+
+def count_dashboard_stats():
+    """Compute every counter exactly with one aggregate query per table."""
+    values = {}
+    for model, counters in COUNTERS.items():
+        values.update(model.objects.order_by().aggregate(**{
+            column: Count('pk', filter=condition) for column, condition in counters.items()
+        }))
+    return values
+
+
+def read_dashboard_stats():
+    """The current counters: the totals row plus the pending deltas."""
+    totals = DashboardStats.objects.filter(pk=STATS_ID).values(*COLUMNS).first() or dict.fromkeys(COLUMNS, 0)
+    pending = DashboardStatsDelta.objects.aggregate(**{column: Sum(column) for column in COLUMNS})
+    return {column: totals[column] + (pending[column] or 0) for column in COLUMNS}
+
+
+def fold_dashboard_stats():
+    """Add the pending deltas into the totals row. Returns the number of deltas folded.
+    
+    One statement, so the deltas deleted are exactly the ones added; folds
+    running concurrently each add the rows they deleted.
+    """
+    if connection.vendor != 'postgresql':
+        return 0
+    
+    DashboardStats.objects.get_or_create(pk=STATS_ID)
+    sums = ', '.join(f"coalesce(sum({column}), 0) AS {column}" for column in COLUMNS)
+    assignments = ', '.join(f"{column} = stats.{column} + folded.{column}" for column in COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH moved AS (DELETE FROM {DashboardStatsDelta._meta.db_table} RETURNING *)
+            UPDATE {DashboardStats._meta.db_table} AS stats SET {assignments}
+            FROM (SELECT count(*) AS folded_deltas, {sums} FROM moved) AS folded
+            WHERE stats.id = %s
+            RETURNING folded.folded_deltas
+        """, [STATS_ID])
+        return cursor.fetchone()[0]
+
+
+@contextmanager
+def consistent_snapshot():
+    """A transaction whose queries all see the same committed writes.
+    
+    On PostgreSQL a ``REPEATABLE READ READ ONLY`` transaction; its reads
+    take no locks, so writers carry on meanwhile. Inside an enclosing
+    transaction that one's isolation applies.
+    """
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        yield
+
+
+def reconcile_dashboard_stats():
+    """Correct any drift of the counters from exact counts. Returns the drift.
+    
+    The exact counts and the counters are read in one snapshot, so their
+    difference is the drift as of that snapshot, and it is recorded as a
+    delta: writes committed since then are already counted by their own
+    deltas.
+    """
+    with consistent_snapshot():
+        exact = count_dashboard_stats()
+        current = read_dashboard_stats()
+    drift = {column: exact[column] - current[column] for column in COLUMNS if exact[column] != current[column]}
+    if drift:
+        DashboardStatsDelta.objects.create(**drift)
+    
+    DashboardStats.objects.get_or_create(pk=STATS_ID)
+    DashboardStats.objects.filter(pk=STATS_ID).update(reconciled_at=timezone.now())
+    fold_dashboard_stats()
+    return drift
+
+
+def get_admin_stats():
+    """Return the dashboard numbers, cached briefly in the shared cache.
+    
+    Counters come from the trigger-maintained totals and deltas on
+    PostgreSQL; other databases have no triggers, so they are counted
+    exactly instead.
+    """
+    stats = cache.get(CACHE_KEY)
+    if stats is not None:
+        return stats
+    
+    if connection.vendor == 'postgresql':
+        if not DashboardStats.objects.filter(pk=STATS_ID).exists():
+            # Start the totals from exact counts
+            reconcile_dashboard_stats()
+        stats = read_dashboard_stats()
+    else:
+        stats = count_dashboard_stats()
+    
+    total_users = stats['total_users']
+    stats['unverified_users'] = total_users - stats['verified_users']
+    stats['verified_percentage'] = round((stats['verified_users'] / total_users * 100) if total_users > 0 else 0)
+    
+    cache.set(CACHE_KEY, stats, settings.ADMIN_STATS_CACHE_TIMEOUT)
+    return stats
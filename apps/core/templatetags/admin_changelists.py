@@ -0,0 +1,25 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+register = template.Library()
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def cached_date_hierarchy(cl):
+    """Django's ``date_hierarchy`` links, cached per model, filters and language.
+    
+    Building them aggregates every row matching the filters (distinct years,
+    months or days), which is the slowest query of a large changelist.
+    """
+    query = hashlib.sha256(cl.get_query_string().encode()).hexdigest()[:32]
+    key = f"admin-date-hierarchy:{cl.model._meta.label_lower}:{get_language()}:{query}"
+    context = cache.get(key)
+    if context is None:
+        context = date_hierarchy(cl) or {}
+        cache.set(key, context, settings.ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT)
+    return context
@@ -0,0 +1,47 @@
+"""
+Fixtures shared by the test suites.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.calls.models import WakeUpCall, CallLog
+from .models import UserProfile
+
+User = get_user_model()
+
+
+def create_users(prefix, count, role='user'):
+    """Create ``count`` users with profiles; ``role='admin'`` also makes them staff."""
+    return _create_users([f'{prefix}{i:04d}' for i in range(count)], role)
+
+
+def create_user(username, role='user'):
+    return _create_users([username], role)[0]
+
+
+def _create_users(usernames, role):
+    users = User.objects.bulk_create(User(username=username, is_staff=role == 'admin') for username in usernames)
+    UserProfile.objects.bulk_create(UserProfile(user=user, role=role) for user in users)
+    # Loaded the way the authentication backend loads the request user
+    return list(User.objects.select_related('profile').filter(pk__in=[user.pk for user in users]).order_by('pk'))
+
+
+def create_calls(user, count, logs=False, start=None):
+    """Create ``count`` demo calls for ``user`` an hour apart, each with a log if ``logs``."""
+    start = start or timezone.now()
+    calls = WakeUpCall.objects.bulk_create(
+        WakeUpCall(
+            user=user,
+            scheduled_time=start + timedelta(hours=i),
+            phone_number='+15550000000',
+            contact_method='call',
+            zip_code='10001',
+            is_demo=True,
+        )
+        for i in range(count)
+    )
+    if logs:
+        CallLog.objects.bulk_create(CallLog(wakeup_call=call, status='completed') for call in calls)
+    return calls
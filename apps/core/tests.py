@@ -0,0 +1,430 @@
+import json
+import tempfile
+import uuid
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import skipUnless
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import ASGIHandler
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Q
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.calls.models import WakeUpCall, CallLog, InboundCall, Tombstone
+from apps.calls import partitions
+from apps.calls.partitions import DEFAULT_PARTITION
+from .archival import LocalArchiveStorage, restore_archive, retire_calllog_partitions
+from .db_routing import PRIMARY, SESSION_KEY
+from .models import DashboardStats, DashboardStatsDelta, UserProfile
+from .phone import get_user_by_phone
+from .stats import count_dashboard_stats, fold_dashboard_stats, read_dashboard_stats, reconcile_dashboard_stats
+from .query_budget import capture_queries
+from .testing import create_calls, create_user, create_users
+
+User = get_user_model()
+
+HOT_TABLES = {
+    User._meta.db_table,
+    WakeUpCall._meta.db_table,
+    CallLog._meta.db_table,
+    InboundCall._meta.db_table,
+    Tombstone._meta.db_table,
+}
+
+
+def hot_table(relation):
+    """The hot table ``relation`` belongs to (CallLog partitions included), or None."""
+    if relation in HOT_TABLES:
+        return relation
+    if relation == DEFAULT_PARTITION or relation.startswith(f'{CallLog._meta.db_table}_p'):
+        return CallLog._meta.db_table
+    return None
+
+
+@skipUnless(connection.vendor == 'postgresql', 'query plans are checked on PostgreSQL')
+class QueryPlanTests(TestCase):
+    """EXPLAIN the hot queries and fail if any of them reads a whole hot table.
+    
+    The test data is far too small for the planner to prefer an index by
+    itself, so sequential scans are disabled: a query only fails when no
+    index can serve it at all.
+    """
+    
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        users = create_users('plans_', 20)
+        for i, user in enumerate(users):
+            calls = create_calls(user, 25, logs=True, start=now - timedelta(days=i))
+            # Deleted by the tombstone triggers
+            WakeUpCall.objects.filter(pk__in=[call.pk for call in calls[-5:]]).delete()
+        InboundCall.objects.bulk_create(
+            InboundCall(twilio_call_sid=f'CA{i:032x}', from_number='+15550000000', to_number='+15550000001', user=users[i % 20])
+            for i in range(500)
+        )
+        cls.wakeup_call_id, cls.user_id = WakeUpCall.objects.values_list('id', 'user_id').first()
+    
+    def hot_queries(self):
+        user_id = self.user_id
+        wakeup_call_id = self.wakeup_call_id
+        now = timezone.now()
+        return [
+            ('dispatcher: due calls', WakeUpCall.objects.filter(
+                status__in=['scheduled', 'active'],
+                scheduled_time__lte=now + timedelta(minutes=1),
+                scheduled_time__gte=now - timedelta(minutes=1),
+            )),
+            ('home/inbound: user next calls', WakeUpCall.objects.filter(
+                user_id=user_id, status='scheduled').order_by('scheduled_time')),
+            ('home: admin scheduled calls', WakeUpCall.objects.filter(
+                status='scheduled').order_by('scheduled_time')[:10]),
+            ('dashboard: user recent calls', WakeUpCall.objects.filter(
+                user_id=user_id).order_by('-created_at')[:10]),
+            ('admin: calls by status', WakeUpCall.objects.filter(
+                status='completed').order_by('-scheduled_time')[:100]),
+            ('call logs of a call', CallLog.objects.filter(wakeup_call_id=wakeup_call_id)),
+            ('stats: logs by status', CallLog.objects.filter(status='failed').only('pk')),
+            ('admin: latest call logs', CallLog.objects.order_by('-created_at')[:100]),
+            ('webhook: log by SID', CallLog.objects.filter(twilio_sid='CA00000000000000000000000000000000')),
+            ('webhook: inbound by SID', InboundCall.objects.filter(twilio_call_sid='CA00000000000000000000000000000000')),
+            ('webhook: user by phone', User.objects.filter(phone_e164='+15550000000')),
+            ('api: calls keyset page', WakeUpCall.objects.filter(
+                Q(scheduled_time__gt=now) | Q(scheduled_time=now, id__gt=wakeup_call_id),
+                scheduled_time__gte=now).order_by('scheduled_time', 'id')[:21]),
+            ('api: user calls keyset page', WakeUpCall.objects.filter(
+                Q(scheduled_time__gt=now) | Q(scheduled_time=now, id__gt=wakeup_call_id),
+                user_id=user_id, scheduled_time__gte=now).order_by('scheduled_time', 'id')[:21]),
+            ('api: call logs keyset page', CallLog.objects.filter(
+                Q(created_at__lt=now) | Q(created_at=now, id__lt=1),
+                created_at__lte=now).order_by('-created_at', '-id')[:21]),
+            ('api: user changed calls', WakeUpCall.objects.filter(
+                user_id=user_id, updated_at__gte=now, updated_at__lte=now).order_by('updated_at', 'id')[:101]),
+            ('api: changed call logs', CallLog.objects.filter(
+                updated_at__gte=now, updated_at__lte=now).order_by('updated_at', 'id')[:101]),
+            ('api: user deletions', Tombstone.objects.filter(
+                owner_id=user_id, deleted_at__gte=now, deleted_at__lte=now).order_by('deleted_at', 'id')[:101]),
+        ]
+    
+    def test_hot_queries_use_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {', '.join(sorted(HOT_TABLES))}")
+            # Empty relations (CallLog partitions for other months) have no
+            # statistics to choose an index by, and nothing to scan
+            cursor.execute("SELECT relname FROM pg_class WHERE relkind = 'r' AND reltuples > 0")
+            populated = {relation for relation, in cursor.fetchall()}
+            # Until the test's transaction is rolled back
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        
+        for label, queryset in self.hot_queries():
+            with self.subTest(label):
+                plan = json.loads(queryset.explain(format='json'))
+                scans = sorted(set(self._full_scans(plan[0]['Plan'])) & populated)
+                self.assertEqual(scans, [], f'{label} scans all of {", ".join(scans)}:\n{queryset.explain()}')
+    
+    def _full_scans(self, node, limited=False):
+        """Relations of the hot tables read in full.
+        
+        With sequential scans off, an unindexed filter shows up as an index
+        scan without an index condition, walking a whole index for its
+        order; that is only bounded under a LIMIT.
+        """
+        relation = node.get('Relation Name', '')
+        if hot_table(relation):
+            if node.get('Node Type') == 'Seq Scan':
+                yield relation
+            elif node.get('Node Type') in ('Index Scan', 'Index Only Scan') and 'Index Cond' not in node and not limited:
+                yield relation
+        limited = limited or node.get('Node Type') == 'Limit'
+        for child in node.get('Plans', []):
+            yield from self._full_scans(child, limited)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'dashboard counters are maintained by PostgreSQL triggers')
+class DashboardStatsTests(TestCase):
+    
+    def setUp(self):
+        reconcile_dashboard_stats()
+        user = create_user('stats_user')
+        calls = create_calls(user, 10, logs=True)
+        WakeUpCall.objects.filter(pk__in=[call.pk for call in calls[:3]]).update(status='completed')
+        CallLog.objects.filter(wakeup_call__in=calls[:2]).update(status='failed')
+        WakeUpCall.objects.filter(pk=calls[-1].pk).delete()
+    
+    def test_triggers_append_deltas(self):
+        self.assertTrue(DashboardStatsDelta.objects.exists())
+        self.assertEqual(read_dashboard_stats(), count_dashboard_stats())
+    
+    def test_fold(self):
+        deltas = DashboardStatsDelta.objects.count()
+        self.assertEqual(fold_dashboard_stats(), deltas)
+        self.assertFalse(DashboardStatsDelta.objects.exists())
+        self.assertEqual(read_dashboard_stats(), count_dashboard_stats())
+    
+    def test_reconcile_corrects_drift(self):
+        DashboardStats.objects.update(total_calls=-5, failed_logs=100)
+        drift = reconcile_dashboard_stats()
+        self.assertEqual(set(drift), {'total_calls', 'failed_logs'})
+        self.assertEqual(read_dashboard_stats(), count_dashboard_stats())
+        self.assertEqual(reconcile_dashboard_stats(), {})
+
+
+@skipUnless(connection.vendor == 'postgresql', 'CallLog is partitioned on PostgreSQL')
+class CallLogPartitionTests(TestCase):
+    
+    MONTH = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+    
+    def setUp(self):
+        calls = create_calls(create_user('partitions_user'), 5, logs=True)
+        # Before any partition: held by the default partition
+        CallLog.objects.filter(wakeup_call__in=calls).update(created_at=self.MONTH + timedelta(days=3))
+        self.log_ids = sorted(CallLog.objects.filter(wakeup_call__in=calls).values_list('id', flat=True))
+        reconcile_dashboard_stats()
+    
+    def partition_ids(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM "{table}" ORDER BY id')
+            return [row[0] for row in cursor.fetchall()]
+    
+    def test_create_partition_over_default_rows(self):
+        tombstones = Tombstone.objects.count()
+        self.assertEqual(partitions.create_partitions(connection, self.MONTH, self.MONTH), ['calls_calllog_p2020_01'])
+        self.assertEqual(self.partition_ids('calls_calllog_p2020_01'), self.log_ids)
+        self.assertEqual(self.partition_ids(DEFAULT_PARTITION), [])
+        self.assertEqual(Tombstone.objects.count(), tombstones)
+        self.assertEqual(read_dashboard_stats(), count_dashboard_stats())
+    
+    def test_retire(self):
+        partitions.create_partitions(connection, self.MONTH, self.MONTH)
+        storage = LocalArchiveStorage(self.enterContext(tempfile.TemporaryDirectory()))
+        
+        retired = retire_calllog_partitions(connection, partitions.add_months(self.MONTH, 1), storage, batch_size=2)
+        self.assertEqual(retired, ['calls_calllog_p2020_01'])
+        self.assertNotIn(self.MONTH, partitions.list_partitions(connection))
+        self.assertEqual(partitions.list_detached_partitions(connection), [])
+        self.assertFalse(CallLog.objects.filter(id__in=self.log_ids).exists())
+        self.assertEqual(
+            sorted(map(int, Tombstone.objects.filter(kind=Tombstone.CALL_LOG).values_list('object_id', flat=True))),
+            self.log_ids,
+        )
+        self.assertEqual(read_dashboard_stats(), count_dashboard_stats())
+        
+        self.assertEqual(restore_archive('call_log_partitions/calls_calllog_p2020_01', storage), len(self.log_ids))
+        self.assertEqual(sorted(CallLog.objects.filter(id__in=self.log_ids).values_list('id', flat=True)), self.log_ids)
+
+
+class TransitionTests(TestCase):
+    
+    def setUp(self):
+        self.user = create_user('transition_user')
+        self.calls = create_calls(self.user, 3)
+        WakeUpCall.objects.filter(pk=self.calls[0].pk).update(status='completed')
+    
+    def test_only_rows_in_from_statuses_change(self):
+        changed = WakeUpCall.objects.filter(user=self.user).transition(WakeUpCall.PENDING_STATUSES, status='cancelled')
+        self.assertEqual(changed, 2)
+        statuses = dict(WakeUpCall.objects.filter(user=self.user).values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[call.pk] for call in self.calls],
+            ['completed', 'cancelled', 'cancelled'],
+        )
+        self.assertFalse(WakeUpCall.objects.filter(user=self.user).transition(['scheduled'], status='failed'))
+    
+    def test_any_status(self):
+        changed = WakeUpCall.objects.filter(pk=self.calls[0].pk).transition(None, contact_method='sms')
+        self.assertEqual(changed, 1)
+        call = WakeUpCall.objects.get(pk=self.calls[0].pk)
+        self.assertEqual(call.contact_method, 'sms')
+        self.assertGreater(call.updated_at, self.calls[0].updated_at)
+    
+    @skipUnless(connection.vendor == 'postgresql', 'UPDATE ... RETURNING is used on PostgreSQL')
+    def test_single_statement(self):
+        with CaptureQueriesContext(connection) as queries:
+            WakeUpCall.objects.filter(user=self.user).transition(WakeUpCall.PENDING_STATUSES, status='cancelled')
+        self.assertEqual(len(queries), 1, [query['sql'] for query in queries])
+        self.assertTrue(queries[0]['sql'].startswith('UPDATE'))
+
+
+# Replicas cannot see the rows of a TestCase's open transaction
+@override_settings(DATABASE_REPLICAS=[])
+class RoleQueryTests(TestCase):
+    """Role-dependent pages load the request user's profile exactly once."""
+    
+    # Role -> pages requested as a user with that role
+    PAGES = {
+        'admin': ['home', 'admin:index', 'user-me', 'wakeupcall-list', 'calllog-list'],
+        'user': ['home', 'dashboard', 'user-me', 'wakeupcall-list', 'calllog-list'],
+    }
+    
+    def test_profile_loaded_once_per_request(self):
+        profile_table = f'"{UserProfile._meta.db_table}"'
+        for role, pages in self.PAGES.items():
+            self.client.force_login(create_user(f'roles_{role}', role=role))
+            for name in pages:
+                with self.subTest(role=role, page=name):
+                    with capture_queries(self.databases) as queries:
+                        response = self.client.get(reverse(name))
+                    self.assertEqual(response.status_code, 200)
+                    loads = sum(profile_table in query['sql'] for query in queries)
+                    self.assertEqual(loads, 1, f'{role} {name} loaded the profile {loads} times')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'row estimates are read from PostgreSQL plans')
+@override_settings(DATABASE_REPLICAS=[], ADMIN_EXACT_COUNT_THRESHOLD=0)
+class EstimatedCountTests(TestCase):
+    """Changelists only paginate by the planner's estimate when unfiltered."""
+    
+    def setUp(self):
+        admin = create_user('changelist_admin', role='admin')
+        User.objects.filter(pk=admin.pk).update(is_superuser=True)
+        create_calls(admin, 5)
+        self.client.force_login(admin)
+    
+    def test_estimate_only_without_filters(self):
+        url = reverse('admin:calls_wakeupcall_changelist')
+        for params, estimated in [({}, True), ({'status': 'completed'}, False), ({'q': 'changelist'}, False)]:
+            with self.subTest(params=params):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(any(query['sql'].startswith('EXPLAIN') for query in queries), estimated)
+
+
+STATIC_FILES_MIDDLEWARE = 'whitenoise.middleware.WhiteNoiseMiddleware'
+
+# The middleware wakeupcall.asgi runs
+ASGI_MIDDLEWARE = [path for path in settings.MIDDLEWARE if path != STATIC_FILES_MIDDLEWARE]
+
+
+# Django only logs the adaptations with DEBUG on
+@override_settings(DEBUG=True)
+class ASGIMiddlewareTests(SimpleTestCase):
+    """Without WhiteNoise's middleware, no request is adapted to a sync middleware."""
+    
+    def test_asgi_chain_is_async(self):
+        with override_settings(MIDDLEWARE=ASGI_MIDDLEWARE), self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+    
+    def test_sync_middleware_is_detected(self):
+        with override_settings(MIDDLEWARE=[*ASGI_MIDDLEWARE, STATIC_FILES_MIDDLEWARE]):
+            with self.assertLogs('django.request', 'DEBUG') as logs:
+                ASGIHandler()
+        self.assertIn(STATIC_FILES_MIDDLEWARE, '\n'.join(logs.output))
+
+
+# Replicas cannot see the rows of a TestCase's open transaction
+@override_settings(MIDDLEWARE=ASGI_MIDDLEWARE, DATABASE_REPLICAS=[])
+class AsyncMiddlewareTests(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('async_user')
+        cls.admin = create_user('async_admin', role='admin')
+    
+    async def test_admin_denied_to_regular_user(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get('/admin/')
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+    
+    async def test_admin_allowed_to_admin(self):
+        await sync_to_async(self.async_client.force_login)(self.admin)
+        response = await self.async_client.get('/admin/')
+        self.assertEqual(response.status_code, 200)
+    
+    async def test_writer_sticks_to_primary(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.post(
+            reverse('update_profile'), '{"zip_code": "10001"}', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(SESSION_KEY, await sync_to_async(lambda: dict(self.async_client.session))())
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'no read replicas configured (DB_REPLICA_HOSTS)')
+class DatabaseRoutingTests(TransactionTestCase):
+    """Safe requests read from replicas; writers, webhooks and tasks stay on the primary.
+    
+    Replicas are test mirrors of the primary, so they only see committed
+    rows: hence a TransactionTestCase.
+    """
+    databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+    
+    def setUp(self):
+        self.client.force_login(create_user('routing_user'))
+    
+    def assertReadsFromReplica(self, expected, action):
+        with ExitStack() as stack:
+            captured = {alias: stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in self.databases}
+            action()
+        replica_queries = sum(len(captured[alias]) for alias in settings.DATABASE_REPLICAS)
+        summary = f'{len(captured[PRIMARY])} primary / {replica_queries} replica queries'
+        self.assertEqual(bool(replica_queries), expected, summary)
+    
+    def test_safe_request_reads_from_replica(self):
+        self.assertReadsFromReplica(True, lambda: self.client.get(reverse('home')))
+    
+    def test_writer_reads_own_writes_from_primary(self):
+        self.assertReadsFromReplica(False, lambda: self.client.post(
+            reverse('update_profile'), '{"zip_code": "10001"}', content_type='application/json'
+        ))
+        self.assertReadsFromReplica(False, lambda: self.client.get(reverse('home')))
+    
+    def test_webhook_reads_from_primary(self):
+        self.assertReadsFromReplica(False, lambda: Client().get(reverse('calls:voice_response', args=[uuid.uuid4()])))
+    
+    def test_tasks_read_from_primary(self):
+        self.assertReadsFromReplica(False, lambda: WakeUpCall.objects.filter(status='scheduled').count())
+
+
+class PhoneBackfillMigrationTests(TransactionTestCase):
+    """A number shared by several accounts goes to its oldest verified owner."""
+    
+    def setUp(self):
+        self.apps = self.migrate([('core', '0002_user_phone_e164')])
+        User = self.apps.get_model('core', 'User')
+        # Same number, typed differently; the oldest account never verified it
+        self.unverified, self.owner, self.newer = [
+            User.objects.create(username=username, phone_number=phone_number, is_phone_verified=verified)
+            for username, phone_number, verified in [
+                ('backfill_unverified', '(555) 010-1234', False),
+                ('backfill_owner', '+1 555 010 1234', True),
+                ('backfill_newer', '555.010.1234', True),
+            ]
+        ]
+        cache.clear()
+    
+    def tearDown(self):
+        self.migrate(None)
+    
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        targets = targets or executor.loader.graph.leaf_nodes()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+    
+    def assertOwnedByVerifiedUser(self):
+        self.assertEqual(
+            dict(User.objects.filter(username__startswith='backfill_').values_list('username', 'phone_e164')),
+            {'backfill_unverified': None, 'backfill_owner': '+15550101234', 'backfill_newer': None},
+        )
+        self.assertEqual(get_user_by_phone('+15550101234').pk, self.owner.pk)
+    
+    def test_backfill(self):
+        self.migrate([('core', '0005_user_phone_e164_verified_only')])
+        self.assertOwnedByVerifiedUser()
+    
+    def test_backfilled_by_unverified_user(self):
+        # As left by 0003 when it also indexed unverified numbers
+        apps = self.migrate([('core', '0003_backfill_user_phone_e164')])
+        User = apps.get_model('core', 'User')
+        User.objects.filter(username__startswith='backfill_').update(phone_e164=None)
+        User.objects.filter(pk=self.unverified.pk).update(phone_e164='+15550101234')
+        self.migrate([('core', '0005_user_phone_e164_verified_only')])
+        self.assertOwnedByVerifiedUser()
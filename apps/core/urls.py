@@ -6,6 +6,7 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('api/update-profile/', views.update_profile, name='update_profile'),
+    path('metrics/db/', views.db_metrics, name='db_metrics'),
     path('login/', views.CustomLoginView.as_view(), name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
 ]
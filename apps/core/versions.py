@@ -0,0 +1,78 @@
+"""
+Per-user data version stamps.
+
+Every write to a user's wake-up calls, profile or account replaces that
+user's stamp, and the global stamp that admin-wide lists depend on, in the
+shared cache. API reads derive ETags from the stamps, so a client polling
+unchanged data is answered with 304 before anything is queried.
+
+Model saves and deletes bump through signals. Writes that skip signals
+(``WakeUpCall.objects.transition``, the bulk API actions) bump explicitly.
+Bumps wait for the transaction to commit: a stamp replaced earlier could
+be paired with a read of the old rows and never be invalidated.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .uuids import uuid7
+
+logger = logging.getLogger(__name__)
+
+GLOBAL = 'all'
+CACHE_PREFIX = 'data-version:'
+
+
+def _key(scope):
+    return f"{CACHE_PREFIX}{scope}"
+
+
+def get_version(scope):
+    """Return the current stamp for a user ID (or ``GLOBAL``), creating it if missing."""
+    version = cache.get(_key(scope))
+    if version is None:
+        # add() keeps a stamp another process created meanwhile
+        cache.add(_key(scope), uuid7().hex, None)
+        version = cache.get(_key(scope))
+    return version
+
+
+def _stamps(user_ids):
+    stamp = uuid7().hex
+    return {_key(scope): stamp for scope in {*user_ids, GLOBAL}}
+
+
+def _set_stamps(user_ids):
+    try:
+        cache.set_many(_stamps(user_ids), None)
+    except Exception as e:
+        logger.error(f"Failed to bump data versions for users {sorted(user_ids)}: {e}")
+
+
+def bump_user_versions(user_ids):
+    """Mark the data of the given users (and everything, for admins) as changed."""
+    user_ids = set(user_ids)
+    transaction.on_commit(lambda: _set_stamps(user_ids))
+
+
+async def abump_user_versions(user_ids):
+    # Only used outside transactions, where on_commit would run immediately
+    user_ids = set(user_ids)
+    try:
+        await cache.aset_many(_stamps(user_ids), None)
+    except Exception as e:
+        logger.error(f"Failed to bump data versions for users {sorted(user_ids)}: {e}")
+
+
+@receiver([post_save, post_delete], sender='calls.WakeUpCall')
+@receiver([post_save, post_delete], sender='core.UserProfile')
+def bump_owner_version(sender, instance, **kwargs):
+    bump_user_versions([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender='core.User')
+def bump_user_version(sender, instance, **kwargs):
+    bump_user_versions([instance.pk])
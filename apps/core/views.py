@@ -10,6 +10,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
 
+from .db_metrics import process_metrics, server_metrics
 from .models import UserProfile, User
 from apps.calls.models import WakeUpCall
 from apps.calls.services import TwilioService
@@ -28,19 +29,7 @@ class CustomLoginView(LoginView):
         # Now check the user's role and redirect accordingly
         user = form.get_user()
         
-        # Check if user has admin role with proper error handling
-        try:
-            # Try to get the profile and check if user is admin
-            if hasattr(user, 'profile'):
-                profile = getattr(user, 'profile', None)
-                is_admin = profile and profile.role == 'admin'
-            else:
-                is_admin = False
-        except Exception:
-            # If any error occurs, treat as regular user
-            is_admin = False
-        
-        if is_admin:
+        if user.is_admin:
             return HttpResponseRedirect(reverse('admin:index'))
         else:
             # Regular users go to home page - this should be the case for demo_user_1
@@ -51,9 +40,7 @@ def home(request):
     """Home page with role-based access."""
     context = {}
     if request.user.is_authenticated:
-        # Check if user has profile and what role they have
-        is_admin = (hasattr(request.user, 'profile') and 
-                   request.user.profile.role == 'admin')
+        is_admin = request.user.is_admin
         
         if is_admin:
             # Admins can see all scheduled calls
@@ -70,8 +57,7 @@ def home(request):
 def dashboard(request):
     """User dashboard - only for regular users."""
     # Redirect admin users to admin dashboard
-    if (hasattr(request.user, 'profile') and 
-        request.user.profile.role == 'admin'):
+    if request.user.is_admin:
         return redirect('admin:index')
     
     user_wakeup_calls = WakeUpCall.objects.filter(user=request.user).order_by('-created_at')[:10]
@@ -102,3 +88,14 @@ def update_profile(request):
         return JsonResponse({'success': True, 'message': 'Profile updated successfully'})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+
+@login_required
+def db_metrics(request):
+    """Database connection metrics of this process and the server (admins only)."""
+    if not request.user.is_admin:
+        return JsonResponse({'message': 'Admin privileges required.'}, status=403)
+    return JsonResponse({
+        'process': process_metrics(),
+        'server': server_metrics(),
+    })
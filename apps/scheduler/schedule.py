@@ -0,0 +1,87 @@
+"""
+One-off Celery beat entries for wake-up calls.
+
+Each scheduled call gets a ``PeriodicTask`` named ``wakeup-call-<id>`` on a
+crontab for its minute. These functions handle many calls at once: the
+crontabs are looked up in one query (missing ones bulk-created), the tasks
+are upserted with one ``bulk_create``, and beat is told to reload once.
+"""
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django_celery_beat.models import CrontabSchedule, PeriodicTask, PeriodicTasks
+
+TASK = 'apps.scheduler.tasks.execute_wakeup_call'
+
+
+def task_name(wakeup_call_id):
+    return f"wakeup-call-{wakeup_call_id}"
+
+
+def _crontab_fields(scheduled_time):
+    return {
+        'minute': str(scheduled_time.minute),
+        'hour': str(scheduled_time.hour),
+        'day_of_month': str(scheduled_time.day),
+        'month_of_year': str(scheduled_time.month),
+        'day_of_week': '*',
+    }
+
+
+def _crontab_fields_of(crontab):
+    return {field: getattr(crontab, field) for field in ('minute', 'hour', 'day_of_month', 'month_of_year', 'day_of_week')}
+
+
+def _crontabs(scheduled_times):
+    """Return ``{crontab fields: CrontabSchedule}`` for every distinct minute."""
+    wanted = {tuple(_crontab_fields(t).items()) for t in scheduled_times}
+    crontabs = {}
+    existing = CrontabSchedule.objects.filter(reduce(or_, (Q(**dict(key)) for key in wanted)))
+    for crontab in existing:
+        key = tuple(_crontab_fields_of(crontab).items())
+        crontabs.setdefault(key, crontab)
+    
+    missing = [CrontabSchedule(**dict(key)) for key in wanted if key not in crontabs]
+    for crontab in CrontabSchedule.objects.bulk_create(missing):
+        crontabs[tuple(_crontab_fields_of(crontab).items())] = crontab
+    return crontabs
+
+
+def schedule_wakeup_calls(wakeup_calls):
+    """Create or move the beat entries of ``wakeup_calls``."""
+    if not wakeup_calls:
+        return
+    crontabs = _crontabs(call.scheduled_time for call in wakeup_calls)
+    tasks = [
+        PeriodicTask(
+            name=task_name(call.id),
+            crontab=crontabs[tuple(_crontab_fields(call.scheduled_time).items())],
+            task=TASK,
+            args=json.dumps([str(call.id)]),
+            enabled=True,
+            one_off=True,  # Run only once
+        )
+        for call in wakeup_calls
+    ]
+    PeriodicTask.objects.bulk_create(
+        tasks,
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=['crontab', 'task', 'args', 'enabled', 'one_off'],
+    )
+    # bulk_create skips the signals that normally tell beat to reload
+    PeriodicTasks.update_changed()
+
+
+def unschedule_wakeup_calls(wakeup_call_ids):
+    """Disable the beat entries of the given calls.
+    
+    Disabling is one UPDATE, where deleting would send beat's delete
+    signals once per task; beat leaves one-off tasks disabled after they
+    run anyway.
+    """
+    names = [task_name(pk) for pk in wakeup_call_ids]
+    if names and PeriodicTask.objects.filter(name__in=names, enabled=True).update(enabled=False):
+        PeriodicTasks.update_changed()
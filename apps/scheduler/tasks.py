@@ -5,10 +5,16 @@ from celery import shared_task
 from django.utils import timezone
 from django.urls import reverse
 from django.conf import settings
+from django.db import connection
 import logging
 
 from apps.calls.models import WakeUpCall, CallLog
 from apps.calls.services import TwilioService, WeatherService, generate_voice_response, generate_sms_message
+from apps.calls.sid_routing import CALL_LOG, register_sid
+from apps.calls import partitions
+from apps.calls.changes import prune_tombstones
+from apps.core.archival import DATASETS, archive_dataset, retire_calllog_partitions
+from apps.core.stats import fold_dashboard_stats, reconcile_dashboard_stats
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +29,7 @@ def execute_wakeup_call(wakeup_call_id):
         return False
     
     # Check if call is still scheduled and not cancelled
-    if wakeup_call.status not in ['scheduled', 'active']:
+    if wakeup_call.status not in WakeUpCall.PENDING_STATUSES:
         logger.info(f"WakeUpCall {wakeup_call_id} is no longer active")
         return False
     
@@ -38,12 +44,15 @@ def execute_wakeup_call(wakeup_call_id):
         weather_data=weather_data
     )
     
+    # Columns written back to the wake-up call when it finishes
+    changes = {}
+    
     try:
         if wakeup_call.is_demo:
             # Demo mode - just log
             logger.info(f"Demo wake-up call for {wakeup_call.user.username}")
             call_log.status = 'completed'
-            call_log.save()
+            call_log.save(update_fields=['status', 'updated_at'])
         else:
             # Real call/SMS
             twilio_service = TwilioService()
@@ -56,11 +65,11 @@ def execute_wakeup_call(wakeup_call_id):
                 if twilio_sid:
                     call_log.twilio_sid = twilio_sid
                     call_log.status = 'completed'
-                    wakeup_call.status = 'completed'
+                    changes['status'] = 'completed'
                 else:
                     call_log.status = 'failed'
                     call_log.error_message = "Failed to initiate call"
-                    wakeup_call.status = 'failed'
+                    changes['status'] = 'failed'
             
             elif wakeup_call.contact_method == 'sms':
                 message = generate_sms_message(weather_data, wakeup_call)
@@ -69,16 +78,16 @@ def execute_wakeup_call(wakeup_call_id):
                 if twilio_sid:
                     call_log.twilio_sid = twilio_sid
                     call_log.status = 'completed'
-                    wakeup_call.status = 'completed'
+                    changes['status'] = 'completed'
                 else:
                     call_log.status = 'failed'
                     call_log.error_message = "Failed to send SMS"
-                    wakeup_call.status = 'failed'
+                    changes['status'] = 'failed'
             
-            call_log.save()
+            call_log.save(update_fields=['status', 'twilio_sid', 'error_message', 'updated_at'])
+            register_sid(call_log.twilio_sid, CALL_LOG, call_log.pk)
         
-        wakeup_call.last_executed = timezone.now()
-        wakeup_call.save()
+        _finish_wakeup_call(wakeup_call_id, last_executed=timezone.now(), **changes)
         
         return True
         
@@ -86,14 +95,20 @@ def execute_wakeup_call(wakeup_call_id):
         logger.error(f"Error executing wakeup call {wakeup_call_id}: {e}")
         call_log.status = 'failed'
         call_log.error_message = str(e)
-        call_log.save()
+        call_log.save(update_fields=['status', 'error_message', 'updated_at'])
         
-        wakeup_call.status = 'failed'
-        wakeup_call.save()
+        _finish_wakeup_call(wakeup_call_id, status='failed')
         
         return False
 
 
+def _finish_wakeup_call(wakeup_call_id, **changes):
+    # Only a call that is still pending is updated, so a cancel that landed
+    # while Twilio was dialing is not overwritten
+    if not WakeUpCall.objects.filter(id=wakeup_call_id).transition(WakeUpCall.PENDING_STATUSES, **changes):
+        logger.info(f"WakeUpCall {wakeup_call_id} changed while executing, keeping its status")
+
+
 @shared_task
 def schedule_recurring_wakeup_calls():
     """Schedule all pending wake-up calls."""
@@ -101,7 +116,7 @@ def schedule_recurring_wakeup_calls():
     
     # Find calls that should be executed now or in the next minute
     pending_calls = WakeUpCall.objects.filter(
-        status__in=['scheduled', 'active'],
+        status__in=WakeUpCall.PENDING_STATUSES,
         scheduled_time__lte=current_time + timezone.timedelta(minutes=1),
         scheduled_time__gte=current_time - timezone.timedelta(minutes=1)
     )
@@ -110,3 +125,48 @@ def schedule_recurring_wakeup_calls():
         execute_wakeup_call.delay(str(wakeup_call.id))
     
     logger.info(f"Scheduled {pending_calls.count()} wake-up calls")
+
+
+@shared_task
+def maintain_calllog_partitions():
+    """Create upcoming CallLog partitions and retire expired ones."""
+    if not partitions.is_partitioned(connection):
+        logger.info("CallLog table is not partitioned, nothing to maintain")
+        return
+    
+    this_month = partitions.month_start(timezone.now())
+    partitions.create_partitions(
+        connection,
+        this_month,
+        partitions.add_months(this_month, settings.CALLLOG_PARTITION_MONTHS_AHEAD)
+    )
+    
+    if settings.CALLLOG_RETENTION_MONTHS:
+        retire_calllog_partitions(
+            connection,
+            partitions.add_months(this_month, -settings.CALLLOG_RETENTION_MONTHS)
+        )
+
+
+@shared_task
+def archive_expired_data():
+    """Archive and delete rows past their retention period."""
+    return {name: archive_dataset(name) for name in DATASETS}
+
+
+@shared_task
+def fold_admin_stats():
+    """Add the dashboard counter deltas written since the last run into the totals."""
+    return fold_dashboard_stats()
+
+
+@shared_task
+def reconcile_admin_stats():
+    """Correct any drift in the incrementally maintained dashboard counters."""
+    reconcile_dashboard_stats()
+
+
+@shared_task
+def prune_change_feed_tombstones():
+    """Drop tombstones older than the change feed keeps them."""
+    return prune_tombstones()
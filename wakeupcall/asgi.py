@@ -1,11 +1,39 @@
 """
 ASGI config for wakeupcall project.
+
+Static files are served by WhiteNoise in front of Django rather than by its
+sync-only middleware, so the middleware chain stays async end to end and
+the async webhook views run on the event loop. Only static requests take a
+thread.
 """
 
 import os
 
+from asgiref.wsgi import WsgiToAsgi
+from django.conf import settings
 from django.core.asgi import get_asgi_application
+from whitenoise import WhiteNoise
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'wakeupcall.settings')
+os.environ.setdefault('STATIC_FILES_MIDDLEWARE', 'False')
+# Persistent connections leak under ASGI (one thread per request), so each
+# request connects anew: to the PgBouncer next to the web server
+# (docker-compose.yml, aws-deployment/task-definition.json), which keeps the
+# server connections open
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+django_application = get_asgi_application()
+
+
+def static_file_not_found(environ, start_response):
+    start_response('404 Not Found', [('Content-Type', 'text/plain')])
+    return [b'Not Found']
+
+
+static_files = WsgiToAsgi(WhiteNoise(static_file_not_found, root=settings.STATIC_ROOT, prefix=settings.STATIC_URL))
+
 
-application = get_asgi_application()
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].startswith(settings.STATIC_URL):
+        return await static_files(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -4,7 +4,7 @@ Django settings for wakeupcall project.
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,14 +43,20 @@ LOCAL_APPS = [
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
+# WhiteNoise's middleware is sync-only: in an ASGI middleware chain it would
+# put every request through a thread, so wakeupcall.asgi turns it off and
+# serves static files in front of Django instead
+STATIC_FILES_MIDDLEWARE = config('STATIC_FILES_MIDDLEWARE', default=True, cast=bool)
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    *(['whitenoise.middleware.WhiteNoiseMiddleware'] if STATIC_FILES_MIDDLEWARE else []),
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.db_routing.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'apps.core.admin_access.AdminAccessMiddleware',
@@ -88,12 +94,46 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='postgres'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        # Persistent connections with a health check before reuse. Celery
+        # workers and commands keep one connection per process (Celery's
+        # Django fixup drops inherited connections in prefork children).
+        # Under ASGI every request runs in its own thread, so asgi.py
+        # defaults this to 0 and the web tier connects through PgBouncer
+        # (DB_HOST/DB_PORT; see docker-compose.yml).
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        # Required behind PgBouncer in transaction pooling mode
+        'DISABLE_SERVER_SIDE_CURSORS': config('DB_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
     }
 }
 
+# Read replicas as comma-separated host[:port] entries, sharing the primary's
+# name and credentials. Safe web requests read from them; see
+# apps.core.db_routing.
+for index, replica in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    replica_host, _, replica_port = replica.partition(':')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['apps.core.db_routing.PrimaryReplicaRouter']
+
+# Seconds a session keeps reading from the primary after it writes
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+# Requests under these paths never read from a replica (Twilio webhooks)
+PRIMARY_DB_PATH_PREFIXES = ['/calls/']
+
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
 
+# Loads the profile together with the user, so role checks are free
+AUTHENTICATION_BACKENDS = ['apps.core.backends.ProfileModelBackend']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -130,6 +170,12 @@ TWILIO_AUTH_TOKEN = config('TWILIO_AUTH_TOKEN', default='')
 TWILIO_PHONE_NUMBER = config('TWILIO_PHONE_NUMBER', default='')
 TWILIO_VERIFY_SERVICE_SID = config('TWILIO_VERIFY_SERVICE_SID', default='')
 
+# How long a Twilio SID -> record route stays cached for webhook lookups
+TWILIO_SID_CACHE_TIMEOUT = config('TWILIO_SID_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# How long a phone number -> user ID mapping stays cached for inbound lookups
+PHONE_LOOKUP_CACHE_TIMEOUT = config('PHONE_LOOKUP_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
 # Base URL for webhooks
 BASE_URL = config('BASE_URL', default='http://localhost:8000')
 
@@ -139,6 +185,26 @@ WEATHER_API_KEY = config('WEATHER_API_KEY', default='')
 # Redis Configuration
 REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 
+# Cache shared by all web and worker processes (SID routes, phone lookups,
+# dashboard stats). Set CACHE_URL to an empty value for a per-process cache.
+CACHE_URL = config('CACHE_URL', default=REDIS_URL)
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+
+# Seconds the admin dashboard numbers are cached for
+ADMIN_STATS_CACHE_TIMEOUT = config('ADMIN_STATS_CACHE_TIMEOUT', default=30, cast=int)
+
+# Large admin changelists (PostgreSQL): results estimated above this many rows
+# show the planner's estimate instead of an exact COUNT(*); date_hierarchy
+# links are cached for ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT seconds
+ADMIN_EXACT_COUNT_THRESHOLD = config('ADMIN_EXACT_COUNT_THRESHOLD', default=10000, cast=int)
+ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT = config('ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT', default=300, cast=int)
+
 # Celery Configuration
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
@@ -147,6 +213,72 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# CallLog is partitioned by month (PostgreSQL). Partitions are created this
+# many months ahead; with a retention set, older months are archived to
+# ARCHIVE_STORAGE_URL, tombstoned for the change feed and dropped daily.
+CALLLOG_PARTITION_MONTHS_AHEAD = config('CALLLOG_PARTITION_MONTHS_AHEAD', default=3, cast=int)
+CALLLOG_RETENTION_MONTHS = config('CALLLOG_RETENTION_MONTHS', default=0, cast=int)
+
+# Retention: finished rows older than these many days are archived as gzipped
+# JSON Lines to ARCHIVE_STORAGE_URL (a directory or s3://bucket/prefix) and
+# then deleted. 0 keeps rows forever.
+RETENTION_WAKEUP_CALL_DAYS = config('RETENTION_WAKEUP_CALL_DAYS', default=90, cast=int)
+RETENTION_INBOUND_CALL_DAYS = config('RETENTION_INBOUND_CALL_DAYS', default=90, cast=int)
+RETENTION_PHONE_VERIFICATION_DAYS = config('RETENTION_PHONE_VERIFICATION_DAYS', default=7, cast=int)
+ARCHIVE_STORAGE_URL = config('ARCHIVE_STORAGE_URL', default=str(BASE_DIR / 'archives'))
+ARCHIVE_S3_ENDPOINT_URL = config('ARCHIVE_S3_ENDPOINT_URL', default='')
+ARCHIVE_BATCH_SIZE = config('ARCHIVE_BATCH_SIZE', default=1000, cast=int)
+
+CELERY_BEAT_SCHEDULE = {
+    'maintain-calllog-partitions': {
+        'task': 'apps.scheduler.tasks.maintain_calllog_partitions',
+        'schedule': 60 * 60 * 24,
+    },
+    'archive-expired-data': {
+        'task': 'apps.scheduler.tasks.archive_expired_data',
+        'schedule': 60 * 60 * 24,
+    },
+    'fold-admin-stats': {
+        'task': 'apps.scheduler.tasks.fold_admin_stats',
+        'schedule': 60,
+    },
+    'reconcile-admin-stats': {
+        'task': 'apps.scheduler.tasks.reconcile_admin_stats',
+        'schedule': 60 * 60,
+    },
+    'prune-change-feed-tombstones': {
+        'task': 'apps.scheduler.tasks.prune_change_feed_tombstones',
+        'schedule': 60 * 60 * 24,
+    },
+}
+
+# Change feed (/api/changes/): rows written less than CHANGE_FEED_SETTLE_SECONDS
+# ago are held back until every transaction that could precede them has
+# committed. Deletions are remembered for CHANGE_FEED_TOMBSTONE_DAYS; clients
+# with older cursors get 410 and resync.
+CHANGE_FEED_SETTLE_SECONDS = config('CHANGE_FEED_SETTLE_SECONDS', default=5, cast=int)
+CHANGE_FEED_TOMBSTONE_DAYS = config('CHANGE_FEED_TOMBSTONE_DAYS', default=30, cast=int)
+
+# Twilio status callbacks are buffered in a Redis stream and written in batches
+# by `manage.py flush_status_callbacks`. Disable to write them synchronously.
+STATUS_BUFFER_ENABLED = config('STATUS_BUFFER_ENABLED', default=True, cast=bool)
+STATUS_BUFFER_STREAM = config('STATUS_BUFFER_STREAM', default='calls:status-callbacks')
+STATUS_BUFFER_MAX_LENGTH = config('STATUS_BUFFER_MAX_LENGTH', default=1000000, cast=int)
+STATUS_BUFFER_BATCH_SIZE = config('STATUS_BUFFER_BATCH_SIZE', default=1000, cast=int)
+STATUS_BUFFER_FLUSH_INTERVAL_MS = config('STATUS_BUFFER_FLUSH_INTERVAL_MS', default=200, cast=int)
+# Callbacks the database rejects (e.g. a value too long for its column) are
+# moved here instead of blocking the stream
+STATUS_BUFFER_DEAD_LETTER_STREAM = config('STATUS_BUFFER_DEAD_LETTER_STREAM', default=f'{STATUS_BUFFER_STREAM}:dead')
+
+# Live call status events: published on Redis pub/sub channels
+# (prefix + user ID) and streamed to the dashboard as Server-Sent Events.
+# Streams end after CALL_EVENTS_STREAM_SECONDS and the browser reconnects.
+CALL_EVENTS_CHANNEL_PREFIX = config('CALL_EVENTS_CHANNEL_PREFIX', default='calls:events:')
+CALL_EVENTS_STREAM_SECONDS = config('CALL_EVENTS_STREAM_SECONDS', default=300, cast=int)
+CALL_EVENTS_KEEPALIVE_SECONDS = config('CALL_EVENTS_KEEPALIVE_SECONDS', default=15, cast=int)
+CALL_EVENTS_RETRY_MS = config('CALL_EVENTS_RETRY_MS', default=3000, cast=int)
+CALL_EVENTS_QUEUE_SIZE = config('CALL_EVENTS_QUEUE_SIZE', default=100, cast=int)
+
 # AWS Configuration
 AWS_ACCESS_KEY_ID = config('AWS_ACCESS_KEY_ID', default='')
 AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY', default='')
@@ -214,7 +346,18 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # orjson when installed, stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Keyset pages by default, ?page=N for numbered pages with a count
+    'DEFAULT_PAGINATION_CLASS': 'apps.api.pagination.KeysetPagination',
     'PAGE_SIZE': 20,
 }
 